@@ -8,7 +8,6 @@ Create Date: 2025-01-12 11:00:00.000000
 from alembic import op
 import sqlalchemy as sa
 from sqlalchemy.dialects import postgresql
-from pgvector.sqlalchemy import Vector
 
 # revision identifiers, used by Alembic.
 revision = '000'
@@ -16,152 +15,179 @@ down_revision = None
 branch_labels = None
 depends_on = None
 
+# Pre-rendered DDL, sent as one multi-statement batch instead of one call per object.
+# no_parameters makes the driver run them on the simple query protocol.
+# Timestamps default to timezone('utc', now()) on the server so inserts don't have to ship them.
+CREATE_ENUMS_SQL = """
+CREATE TYPE casestatus AS ENUM ('NEW', 'EXTRACTING', 'TRANSFORMING', 'CODIFYING', 'REVIEW', 'READY', 'EXPORTED', 'ERROR');
+CREATE TYPE component AS ENUM ('EXTRACT', 'TRANSFORM', 'CODIFY', 'EXPORT');
+CREATE TYPE runstatus AS ENUM ('STARTED', 'SUCCESS', 'FAILED', 'ERROR');
+"""
 
-def upgrade() -> None:
-    # Create enums using raw SQL to avoid conflicts
-    op.execute("CREATE TYPE casestatus AS ENUM ('NEW', 'EXTRACTING', 'TRANSFORMING', 'CODIFYING', 'REVIEW', 'READY', 'EXPORTED', 'ERROR')")
-    op.execute("CREATE TYPE component AS ENUM ('EXTRACT', 'TRANSFORM', 'CODIFY', 'EXPORT')")
-    op.execute("CREATE TYPE runstatus AS ENUM ('STARTED', 'SUCCESS', 'FAILED', 'ERROR')")
-    
-    # Create email_message table first (no dependencies)
-    op.create_table('email_message',
-        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column('from_email', sa.String(), nullable=False),
-        sa.Column('subject', sa.String(), nullable=False),
-        sa.Column('content', sa.Text(), nullable=False),
-        sa.Column('received_at', sa.DateTime(), nullable=False),
-        sa.Column('content_hash', sa.String(), nullable=False),
-        sa.Column('created_at', sa.DateTime(), nullable=True),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_email_message_from_email'), 'email_message', ['from_email'], unique=False)
-    op.create_index('ix_email_message_received_at', 'email_message', ['received_at'], unique=False)
-    op.create_index('ix_email_message_content_hash', 'email_message', ['content_hash'], unique=False)
-    
-    # Create email_attachment table
-    op.create_table('email_attachment',
-        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column('email_message_id', sa.Integer(), nullable=False),
-        sa.Column('original_name', sa.String(), nullable=False),
-        sa.Column('mime_type', sa.String(), nullable=False),
-        sa.Column('file_size', sa.Integer(), nullable=False),
-        sa.Column('sha256', sa.String(), nullable=False),
-        sa.Column('s3_uri', sa.String(), nullable=False),
-        sa.Column('created_at', sa.DateTime(), nullable=True),
-        sa.ForeignKeyConstraint(['email_message_id'], ['email_message.id'], ondelete='CASCADE'),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_email_attachment_email_message_id'), 'email_attachment', ['email_message_id'], unique=False)
-    op.create_index('ix_email_attachment_sha256', 'email_attachment', ['sha256'], unique=False)
-    
-    # Create case table
-    op.create_table('case',
-        sa.Column('id', sa.String(), nullable=False),
-        sa.Column('source', sa.String(), nullable=True),
-        sa.Column('filename', sa.String(), nullable=True),
-        sa.Column('email_message_id', sa.Integer(), nullable=True),
-        sa.Column('status', postgresql.ENUM('NEW', 'EXTRACTING', 'TRANSFORMING', 'CODIFYING', 'REVIEW', 'READY', 'EXPORTED', 'ERROR', name='casestatus', create_type=False), nullable=False),
-        sa.Column('created_at', sa.DateTime(), nullable=False),
-        sa.Column('updated_at', sa.DateTime(), nullable=False),
-        sa.ForeignKeyConstraint(['email_message_id'], ['email_message.id'], ondelete='SET NULL'),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index(op.f('ix_case_email_message_id'), 'case', ['email_message_id'], unique=False)
-    
-    # Create run table
-    op.create_table('run',
-        sa.Column('id', sa.String(), nullable=False),
-        sa.Column('case_id', sa.String(), nullable=False),
-        sa.Column('component', postgresql.ENUM('EXTRACT', 'TRANSFORM', 'CODIFY', 'EXPORT', name='component', create_type=False), nullable=False),
-        sa.Column('profile', sa.String(), nullable=True),
-        sa.Column('status', postgresql.ENUM('STARTED', 'SUCCESS', 'FAILED', 'ERROR', name='runstatus', create_type=False), nullable=False),
-        sa.Column('metrics', sa.JSON(), nullable=False),
-        sa.Column('started_at', sa.DateTime(), nullable=False),
-        sa.Column('finished_at', sa.DateTime(), nullable=True),
-        sa.Column('file_name', sa.String(), nullable=True),
-        sa.Column('file_s3_uri', sa.String(), nullable=True),
-        sa.Column('error_message', sa.Text(), nullable=True),
-        sa.Column('created_at', sa.DateTime(), nullable=False),
-        sa.ForeignKeyConstraint(['case_id'], ['case.id'], ondelete='CASCADE'),
-        sa.PrimaryKeyConstraint('id')
-    )
-    op.create_index('ix_run_case_id', 'run', ['case_id'], unique=False)
-    op.create_index('ix_run_case_component', 'run', ['case_id', 'component'], unique=False)
-    
-    # Create row table
-    op.create_table('row',
-        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column('run_id', sa.String(), nullable=False),
-        sa.Column('row_index', sa.Integer(), nullable=False),
-        sa.Column('raw_data', sa.JSON(), nullable=True),
-        sa.Column('extracted_data', sa.JSON(), nullable=True),
-        sa.Column('transformed_data', sa.JSON(), nullable=True),
-        sa.Column('errors', sa.JSON(), nullable=False),
-        sa.Column('warnings', sa.JSON(), nullable=False),
-        sa.Column('created_at', sa.DateTime(), nullable=False),
-        sa.Column('updated_at', sa.DateTime(), nullable=True),
-        sa.ForeignKeyConstraint(['run_id'], ['run.id'], ondelete='CASCADE'),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('run_id', 'row_index', name='uq_row_run_idx')
-    )
-    op.create_index('ix_row_run_id', 'row', ['run_id'], unique=False)
-    op.create_index('ix_row_row_index', 'row', ['row_index'], unique=False)
-    
-    # Create codify table
-    op.create_table('codify',
-        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column('run_id', sa.String(), nullable=False),
-        sa.Column('row_idx', sa.Integer(), nullable=False),
-        sa.Column('suggested_cvegs', sa.String(), nullable=True),
-        sa.Column('confidence', sa.Float(), nullable=False),
-        sa.Column('candidates', sa.JSON(), nullable=False),
-        sa.Column('decision', sa.String(), nullable=False),
-        sa.ForeignKeyConstraint(['run_id'], ['run.id'], ondelete='CASCADE'),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('run_id', 'row_idx', name='uq_codify_run_idx')
-    )
-    op.create_index('ix_codify_run_id', 'codify', ['run_id'], unique=False)
-    op.create_index('ix_codify_row_idx', 'codify', ['row_idx'], unique=False)
-    op.create_index('ix_codify_high_conf', 'codify', ['confidence'], unique=False)
-    
-    # Create correction table
-    op.create_table('correction',
-        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column('run_id', sa.String(), nullable=False),
-        sa.Column('row_idx', sa.Integer(), nullable=False),
-        sa.Column('from_code', sa.String(), nullable=True),
-        sa.Column('to_code', sa.String(), nullable=False),
-        sa.Column('corrected_at', sa.DateTime(), nullable=False),
-        sa.Column('corrected_by', sa.String(), nullable=True),
-        sa.ForeignKeyConstraint(['run_id'], ['run.id'], ondelete='CASCADE'),
-        sa.PrimaryKeyConstraint('id')
-    )
-    
-    # Create amis_record table
-    op.create_table('amis_record',
-        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
-        sa.Column('cvegs', sa.String(), nullable=False),
-        sa.Column('brand', sa.String(), nullable=False),
-        sa.Column('model', sa.String(), nullable=False),
-        sa.Column('year', sa.Integer(), nullable=False),
-        sa.Column('body_type', sa.String(), nullable=True),
-        sa.Column('use_type', sa.String(), nullable=True),
-        sa.Column('description', sa.String(), nullable=False),
-        sa.Column('embedding', Vector(384), nullable=True),
-        sa.Column('created_at', sa.DateTime(), nullable=False),
-        sa.Column('updated_at', sa.DateTime(), nullable=False),
-        sa.PrimaryKeyConstraint('id'),
-        sa.UniqueConstraint('cvegs', name='uq_amis_record_cvegs')
-    )
-    op.create_index('ix_amis_record_cvegs', 'amis_record', ['cvegs'], unique=True)
-    op.create_index('ix_amis_record_brand', 'amis_record', ['brand'], unique=False)
-    op.create_index('ix_amis_record_model', 'amis_record', ['model'], unique=False)
-    op.create_index('ix_amis_record_year', 'amis_record', ['year'], unique=False)
-    op.create_index('ix_amis_record_body_type', 'amis_record', ['body_type'], unique=False)
-    op.create_index('ix_amis_record_use_type', 'amis_record', ['use_type'], unique=False)
-    op.create_index('ix_amis_brand_model_year', 'amis_record', ['brand', 'model', 'year'], unique=False)
-    op.create_index('ix_amis_description', 'amis_record', ['description'], unique=False)
+CREATE_EMAIL_MESSAGE_SQL = """
+CREATE TABLE email_message (
+    id SERIAL NOT NULL,
+    from_email VARCHAR NOT NULL,
+    subject VARCHAR NOT NULL,
+    content TEXT NOT NULL,
+    received_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    content_hash VARCHAR NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()),
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_email_message_from_email ON email_message (from_email);
+CREATE INDEX ix_email_message_received_at ON email_message (received_at);
+CREATE INDEX ix_email_message_content_hash ON email_message (content_hash);
+"""
+
+CREATE_EMAIL_ATTACHMENT_SQL = """
+CREATE TABLE email_attachment (
+    id SERIAL NOT NULL,
+    email_message_id INTEGER NOT NULL,
+    original_name VARCHAR NOT NULL,
+    mime_type VARCHAR NOT NULL,
+    file_size INTEGER NOT NULL,
+    sha256 VARCHAR NOT NULL,
+    s3_uri VARCHAR NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()),
+    PRIMARY KEY (id),
+    FOREIGN KEY (email_message_id) REFERENCES email_message (id) ON DELETE CASCADE
+);
+CREATE INDEX ix_email_attachment_email_message_id ON email_attachment (email_message_id);
+CREATE INDEX ix_email_attachment_sha256 ON email_attachment (sha256);
+"""
+
+CREATE_CASE_SQL = """
+CREATE TABLE "case" (
+    id VARCHAR NOT NULL,
+    source VARCHAR,
+    filename VARCHAR,
+    email_message_id INTEGER,
+    status casestatus NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (email_message_id) REFERENCES email_message (id) ON DELETE SET NULL
+);
+CREATE INDEX ix_case_email_message_id ON "case" (email_message_id);
+"""
+
+CREATE_RUN_SQL = """
+CREATE TABLE run (
+    id VARCHAR NOT NULL,
+    case_id VARCHAR NOT NULL,
+    component component NOT NULL,
+    profile VARCHAR,
+    status runstatus NOT NULL,
+    metrics JSON NOT NULL,
+    started_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    finished_at TIMESTAMP WITHOUT TIME ZONE,
+    file_name VARCHAR,
+    file_s3_uri VARCHAR,
+    error_message TEXT,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (case_id) REFERENCES "case" (id) ON DELETE CASCADE
+);
+CREATE INDEX ix_run_case_id ON run (case_id);
+CREATE INDEX ix_run_case_component ON run (case_id, component);
+"""
+
+CREATE_ROW_SQL = """
+CREATE TABLE "row" (
+    id SERIAL NOT NULL,
+    run_id VARCHAR NOT NULL,
+    row_index INTEGER NOT NULL,
+    raw_data JSON,
+    extracted_data JSON,
+    transformed_data JSON,
+    errors JSON NOT NULL,
+    warnings JSON NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE,
+    PRIMARY KEY (id),
+    FOREIGN KEY (run_id) REFERENCES run (id) ON DELETE CASCADE,
+    CONSTRAINT uq_row_run_idx UNIQUE (run_id, row_index)
+);
+CREATE INDEX ix_row_run_id ON "row" (run_id);
+CREATE INDEX ix_row_row_index ON "row" (row_index);
+"""
+
+CREATE_CODIFY_SQL = """
+CREATE TABLE codify (
+    id SERIAL NOT NULL,
+    run_id VARCHAR NOT NULL,
+    row_idx INTEGER NOT NULL,
+    suggested_cvegs VARCHAR,
+    confidence FLOAT NOT NULL,
+    candidates JSON NOT NULL,
+    decision VARCHAR NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (run_id) REFERENCES run (id) ON DELETE CASCADE,
+    CONSTRAINT uq_codify_run_idx UNIQUE (run_id, row_idx)
+);
+CREATE INDEX ix_codify_run_id ON codify (run_id);
+CREATE INDEX ix_codify_row_idx ON codify (row_idx);
+CREATE INDEX ix_codify_high_conf ON codify (confidence);
+"""
 
+CREATE_CORRECTION_SQL = """
+CREATE TABLE correction (
+    id SERIAL NOT NULL,
+    run_id VARCHAR NOT NULL,
+    row_idx INTEGER NOT NULL,
+    from_code VARCHAR,
+    to_code VARCHAR NOT NULL,
+    corrected_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    corrected_by VARCHAR,
+    PRIMARY KEY (id),
+    FOREIGN KEY (run_id) REFERENCES run (id) ON DELETE CASCADE
+);
+"""
+
+CREATE_AMIS_RECORD_SQL = """
+CREATE TABLE amis_record (
+    id SERIAL NOT NULL,
+    cvegs VARCHAR NOT NULL,
+    brand VARCHAR NOT NULL,
+    model VARCHAR NOT NULL,
+    year INTEGER NOT NULL,
+    body_type VARCHAR,
+    use_type VARCHAR,
+    description VARCHAR NOT NULL,
+    embedding VECTOR(384),
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT timezone('utc', now()) NOT NULL,
+    PRIMARY KEY (id),
+    CONSTRAINT uq_amis_record_cvegs UNIQUE (cvegs)
+);
+CREATE UNIQUE INDEX ix_amis_record_cvegs ON amis_record (cvegs);
+CREATE INDEX ix_amis_record_brand ON amis_record (brand);
+CREATE INDEX ix_amis_record_model ON amis_record (model);
+CREATE INDEX ix_amis_record_year ON amis_record (year);
+CREATE INDEX ix_amis_record_body_type ON amis_record (body_type);
+CREATE INDEX ix_amis_record_use_type ON amis_record (use_type);
+CREATE INDEX ix_amis_brand_model_year ON amis_record (brand, model, year);
+CREATE INDEX ix_amis_description ON amis_record (description);
+"""
+
+# Dependency order: enums, then each table after the tables it references
+CREATE_BASE_SCHEMA_SQL = "".join([
+    CREATE_ENUMS_SQL,
+    CREATE_EMAIL_MESSAGE_SQL,
+    CREATE_EMAIL_ATTACHMENT_SQL,
+    CREATE_CASE_SQL,
+    CREATE_RUN_SQL,
+    CREATE_ROW_SQL,
+    CREATE_CODIFY_SQL,
+    CREATE_CORRECTION_SQL,
+    CREATE_AMIS_RECORD_SQL,
+])
+
+
+def upgrade() -> None:
+    # Every enum, table and index in one round-trip
+    op.execute(CREATE_BASE_SCHEMA_SQL, execution_options={"no_parameters": True})
 
 def downgrade() -> None:
     # Drop tables in reverse order
@@ -1,7 +1,7 @@
 """add pre-analysis fields to case table
 
 Revision ID: 002
-Revises: 001
+Revises: 000
 Create Date: 2025-09-14 20:17:00.000000
 
 """
@@ -11,7 +11,7 @@ from sqlalchemy.dialects import postgresql
 
 # revision identifiers, used by Alembic.
 revision = '002'
-down_revision = '001'
+down_revision = '000'
 branch_labels = None
 depends_on = None
 
@@ -23,13 +23,16 @@ def upgrade() -> None:
     op.add_column('case', sa.Column('missing_requirements', sa.JSON(), nullable=True))
     op.add_column('case', sa.Column('pre_analysis_notes', sa.Text(), nullable=True))
     
-    # Create index for pre_analysis_status for better query performance
-    op.create_index('ix_case_pre_analysis_status', 'case', ['pre_analysis_status'], unique=False)
+    # Create index for pre_analysis_status for better query performance.
+    # CONCURRENTLY avoids blocking writers on a populated table but cannot run in a transaction.
+    with op.get_context().autocommit_block():
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_case_pre_analysis_status ON "case" (pre_analysis_status)')
 
 
 def downgrade() -> None:
     # Drop index first
-    op.drop_index('ix_case_pre_analysis_status', table_name='case')
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_case_pre_analysis_status')
     
     # Drop columns in reverse order
     op.drop_column('case', 'pre_analysis_notes')
@@ -0,0 +1,37 @@
+"""add HNSW vector index on amis_record.embedding
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Without an ANN index every similarity search is a sequential scan over all vectors.
+    # Built outside a transaction so the session-level settings apply to the parallel build.
+    with op.get_context().autocommit_block():
+        op.execute("SET maintenance_work_mem = '2GB'")
+        op.execute("SET max_parallel_maintenance_workers = 4")
+        try:
+            op.execute(
+                "CREATE INDEX IF NOT EXISTS ix_amis_record_embedding_hnsw ON amis_record "
+                "USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+            )
+        finally:
+            # Don't leave the session tuned for index builds if the build fails
+            op.execute("RESET max_parallel_maintenance_workers")
+            op.execute("RESET maintenance_work_mem")
+        op.execute("ANALYZE amis_record")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_amis_record_embedding_hnsw")
@@ -0,0 +1,48 @@
+"""replace low-selectivity amis_record indexes with a covering composite
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+# Single-column/composite indexes made redundant by the covering index: (name, columns)
+REPLACED_INDEXES = [
+    ('ix_amis_record_brand', ['brand']),
+    ('ix_amis_record_body_type', ['body_type']),
+    ('ix_amis_record_use_type', ['use_type']),
+    ('ix_amis_description', ['description']),
+    ('ix_amis_brand_model_year', ['brand', 'model', 'year']),
+]
+
+
+def upgrade() -> None:
+    # brand/body_type/use_type are too low-cardinality to be selective on their own, and a
+    # B-tree on free-text description is never used; each one only costs a tuple per INSERT.
+    # amis_record is populated, so build and drop without blocking writes.
+    with op.get_context().autocommit_block():
+        # Covering index answers brand/model/year lookups without a heap fetch
+        op.create_index(
+            'ix_amis_bmy_covering', 'amis_record', ['brand', 'model', 'year'],
+            postgresql_include=['cvegs', 'description'],
+            postgresql_concurrently=True,
+        )
+        # DROP INDEX CONCURRENTLY takes one index per statement
+        for name, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name='amis_record', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in REPLACED_INDEXES:
+            op.create_index(name, 'amis_record', columns, unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_amis_bmy_covering', table_name='amis_record', postgresql_concurrently=True, if_exists=True)
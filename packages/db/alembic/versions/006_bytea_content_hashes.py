@@ -0,0 +1,35 @@
+"""store SHA-256 hashes as bytea instead of hex text
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 32 raw bytes instead of 64 hex characters: half the column and index size,
+    # and equality becomes a fixed-length memcmp.
+    op.drop_index('ix_email_message_content_hash', table_name='email_message')
+    op.drop_index('ix_email_attachment_sha256', table_name='email_attachment')
+    op.execute("ALTER TABLE email_message ALTER COLUMN content_hash TYPE bytea USING decode(content_hash, 'hex')")
+    op.execute("ALTER TABLE email_attachment ALTER COLUMN sha256 TYPE bytea USING decode(sha256, 'hex')")
+    op.create_index('ix_email_message_content_hash', 'email_message', ['content_hash'], unique=False)
+    op.create_index('ix_email_attachment_sha256', 'email_attachment', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_message_content_hash', table_name='email_message')
+    op.drop_index('ix_email_attachment_sha256', table_name='email_attachment')
+    op.execute("ALTER TABLE email_message ALTER COLUMN content_hash TYPE varchar USING encode(content_hash, 'hex')")
+    op.execute("ALTER TABLE email_attachment ALTER COLUMN sha256 TYPE varchar USING encode(sha256, 'hex')")
+    op.create_index('ix_email_message_content_hash', 'email_message', ['content_hash'], unique=False)
+    op.create_index('ix_email_attachment_sha256', 'email_attachment', ['sha256'], unique=False)
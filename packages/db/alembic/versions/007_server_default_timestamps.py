@@ -0,0 +1,40 @@
+"""default audit timestamps on the server
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+# (table, columns) whose value is "insert time". Columns stay naive-UTC like datetime.utcnow().
+TIMESTAMP_COLUMNS = [
+    ('email_message', ['created_at']),
+    ('email_attachment', ['created_at']),
+    ('case', ['created_at', 'updated_at']),
+    ('run', ['started_at', 'created_at']),
+    ('row', ['created_at']),
+    ('correction', ['corrected_at']),
+    ('amis_record', ['created_at', 'updated_at']),
+]
+
+
+def upgrade() -> None:
+    for table, columns in TIMESTAMP_COLUMNS:
+        actions = ", ".join(
+            f"ALTER COLUMN {column} SET DEFAULT timezone('utc', now())" for column in columns
+        )
+        op.execute(f'ALTER TABLE "{table}" {actions}')
+
+
+def downgrade() -> None:
+    for table, columns in TIMESTAMP_COLUMNS:
+        actions = ", ".join(f"ALTER COLUMN {column} DROP DEFAULT" for column in columns)
+        op.execute(f'ALTER TABLE "{table}" {actions}')
@@ -0,0 +1,43 @@
+"""rebuild amis_record HNSW index with parameters sized to the catalogue
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+# Sized for a catalogue in the 100k-1M vector range; AmisRecord's Index in
+# app.db.models declares the same values so create_all/autogenerate agree
+HNSW_M = 24
+HNSW_EF_CONSTRUCTION = 128
+
+
+def upgrade() -> None:
+    # Build next to any live index (databases migrated before 004 stopped building one)
+    # so searches keep using one throughout
+    with op.get_context().autocommit_block():
+        op.execute("SET maintenance_work_mem = '2GB'")
+        op.execute("SET max_parallel_maintenance_workers = 7")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_amis_record_embedding_hnsw_tuned ON amis_record "
+            f"USING hnsw (embedding halfvec_cosine_ops) WITH (m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION})"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_amis_record_embedding_hnsw")
+        op.execute("ALTER INDEX ix_amis_record_embedding_hnsw_tuned RENAME TO ix_amis_record_embedding_hnsw")
+        op.execute("RESET max_parallel_maintenance_workers")
+        op.execute("RESET maintenance_work_mem")
+
+
+def downgrade() -> None:
+    # Back to the state 004 leaves: halfvec column, no HNSW index yet
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_amis_record_embedding_hnsw")
@@ -0,0 +1,28 @@
+"""add (brand, year) index to pre-filter vector searches
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # kNN searches filter on brand + year range without model; the (brand, model, year)
+    # covering index can only use its leading column for that, so the planner tends to
+    # post-filter an HNSW scan instead of a bitmap scan + top-N sort.
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_amis_record_brand_year ON amis_record (brand, year)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_amis_record_brand_year")
@@ -0,0 +1,38 @@
+"""store extracted vehicle features as amis_record columns
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+# Populated from app.ml.normalize.vehicle_feature_columns by tools/load_amis.py at ingest;
+# tools/build_embeddings.py backfills rows loaded before this revision
+FEATURE_COLUMNS = ['transmission', 'fuel_type', 'drivetrain', 'engine', 'body_style', 'equipment']
+
+
+def upgrade() -> None:
+    for column in FEATURE_COLUMNS:
+        op.add_column('amis_record', sa.Column(column, sa.String(), nullable=True))
+    
+    # Single-valued features double as cheap pre-filters for vector search;
+    # amis_record is populated, so build them without blocking writes
+    with op.get_context().autocommit_block():
+        op.create_index('ix_amis_record_transmission', 'amis_record', ['transmission'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_amis_record_fuel_type', 'amis_record', ['fuel_type'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_amis_record_fuel_type', table_name='amis_record', postgresql_concurrently=True)
+        op.drop_index('ix_amis_record_transmission', table_name='amis_record', postgresql_concurrently=True)
+    for column in reversed(FEATURE_COLUMNS):
+        op.drop_column('amis_record', column)
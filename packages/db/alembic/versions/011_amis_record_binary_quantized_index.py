@@ -0,0 +1,30 @@
+"""add binary-quantized HNSW index for two-stage vector search
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One bit per dimension (48 bytes/row vs 768 for halfvec). Used as a coarse first
+    # stage whose candidates are reranked exactly on the halfvec column.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_amis_record_embedding_bq_hnsw ON amis_record "
+            "USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_amis_record_embedding_bq_hnsw")
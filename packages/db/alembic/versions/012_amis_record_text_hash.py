@@ -0,0 +1,29 @@
+"""add text_hash to amis_record to skip re-embedding unchanged rows
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # sha256 of the exact text the embedding was computed from (32 raw bytes)
+    op.add_column('amis_record', sa.Column('text_hash', sa.LargeBinary(32), nullable=True))
+    # amis_record is populated; build without blocking writes, as 008 does
+    with op.get_context().autocommit_block():
+        op.create_index('ix_amis_record_text_hash', 'amis_record', ['text_hash'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_amis_record_text_hash', table_name='amis_record', postgresql_concurrently=True)
+    op.drop_column('amis_record', 'text_hash')
@@ -0,0 +1,52 @@
+"""store status/component enums as varchar with CHECK constraints
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+# (table, column, enum type, check constraint, allowed values)
+ENUM_COLUMNS = [
+    ('case', 'status', 'casestatus', 'ck_case_status',
+     ['NEW', 'EXTRACTING', 'TRANSFORMING', 'CODIFYING', 'REVIEW', 'READY', 'EXPORTED', 'ERROR']),
+    ('run', 'component', 'component', 'ck_run_component',
+     ['EXTRACT', 'TRANSFORM', 'CODIFY', 'EXPORT']),
+    ('run', 'status', 'runstatus', 'ck_run_status',
+     ['STARTED', 'SUCCESS', 'FAILED', 'ERROR']),
+]
+
+
+def _values_sql(values) -> str:
+    return ", ".join(f"'{value}'" for value in values)
+
+
+def upgrade() -> None:
+    # New states become a constraint swap instead of ALTER TYPE
+    for table, column, type_name, constraint, values in ENUM_COLUMNS:
+        op.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN {column} TYPE varchar(16) USING {column}::text'
+        )
+        op.create_check_constraint(constraint, table, f"{column} IN ({_values_sql(values)})")
+
+    for _, _, type_name, _, _ in ENUM_COLUMNS:
+        op.execute(f"DROP TYPE IF EXISTS {type_name}")
+
+
+def downgrade() -> None:
+    for _, _, type_name, _, values in ENUM_COLUMNS:
+        op.execute(f"CREATE TYPE {type_name} AS ENUM ({_values_sql(values)})")
+
+    for table, column, type_name, constraint, _ in ENUM_COLUMNS:
+        op.drop_constraint(constraint, table, type_='check')
+        op.execute(
+            f'ALTER TABLE "{table}" ALTER COLUMN {column} TYPE {type_name} USING {column}::{type_name}'
+        )
@@ -0,0 +1,43 @@
+"""use BRIN indexes for append-only timestamp columns
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+# (index, table, column); Index declarations in app.db.models use the same pages_per_range
+BRIN_INDEXES = [
+    ('ix_email_message_received_at', 'email_message', 'received_at'),
+    ('ix_run_created_at', 'run', 'created_at'),
+    ('ix_row_created_at', 'row', 'created_at'),
+    ('ix_correction_corrected_at', 'correction', 'corrected_at'),
+]
+PAGES_PER_RANGE = 32
+
+
+def upgrade() -> None:
+    # Append-only timestamps are physically ordered, so BRIN serves range scans at a
+    # fraction of a B-tree's size. received_at already has a B-tree under the same name.
+    with op.get_context().autocommit_block():
+        for index, table, column in BRIN_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+            op.execute(
+                f'CREATE INDEX CONCURRENTLY {index} ON "{table}" '
+                f"USING brin ({column}) WITH (pages_per_range = {PAGES_PER_RANGE})"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index, _, _ in BRIN_INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+        op.execute("CREATE INDEX CONCURRENTLY ix_email_message_received_at ON email_message (received_at)")
@@ -0,0 +1,41 @@
+"""
+Bulk loading helpers that bypass the ORM for large catalogue writes.
+
+Rows are streamed with PostgreSQL's binary COPY protocol through asyncpg, so a
+full CATVER load is one pipelined write instead of one INSERT per row.
+"""
+from typing import Any, Dict, Iterable, Sequence
+
+from pgvector.asyncpg import register_vector
+
+# created_at/updated_at are filled by server defaults and can be left out
+AMIS_RECORD_COPY_COLUMNS = (
+    "cvegs", "brand", "model", "year", "body_type", "use_type", "description",
+    "transmission", "fuel_type", "drivetrain", "engine", "body_style", "equipment",
+    "embedding",
+)
+
+
+async def bulk_load_amis(conn, rows: Iterable[Dict[str, Any]],
+                         columns: Sequence[str] = AMIS_RECORD_COPY_COLUMNS) -> int:
+    """
+    Stream catalogue rows into amis_record with binary COPY.
+
+    Args:
+        conn: asyncpg connection (from an async SQLAlchemy connection use
+            ``(await conn.get_raw_connection()).driver_connection``)
+        rows: Dictionaries keyed by column name; missing keys are sent as NULL
+        columns: Columns to copy, in order
+
+    Returns:
+        Number of rows copied
+    """
+    # Binary codecs for vector/halfvec so embeddings go over the wire as packed floats
+    await register_vector(conn)
+
+    columns = list(columns)
+    records = (tuple(row.get(column) for column in columns) for row in rows)
+    status = await conn.copy_records_to_table("amis_record", records=records, columns=columns)
+
+    # asyncpg returns the command tag, e.g. "COPY 1200"
+    return int(status.split()[-1])
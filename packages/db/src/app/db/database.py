@@ -1,37 +1,37 @@
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import MetaData
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from contextlib import contextmanager, asynccontextmanager
 from typing import Generator, AsyncGenerator
 
-from libs.common.config import get_settings
+from app.common.config import get_settings
+# The process-wide sync pool lives in session.py
+from app.db.session import engine as sync_engine, SessionLocal as SyncSessionLocal
 
 settings = get_settings()
 
-# Sync database setup
-sync_engine = create_engine(
-    settings.database_url,
-    echo=settings.debug,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True,
-)
-
-SyncSessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=sync_engine
-)
-
 # Async database setup  
-async_database_url = settings.database_url.replace("postgresql://", "postgresql+asyncpg://")
+# Always asyncpg, whatever sync driver DATABASE_URL names; the dialect's prepared-statement
+# cache is configured through the URL, asyncpg's own knobs through connect_args.
+async_database_url = make_url(settings.database_url).set(
+    drivername="postgresql+asyncpg",
+).update_query_dict({"prepared_statement_cache_size": "512"})
 async_engine = create_async_engine(
     async_database_url,
-    echo=settings.debug,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=20,
+    max_overflow=40,
+    pool_recycle=300,
     pool_pre_ping=True,
+    echo=settings.debug,
+    connect_args={
+        "statement_cache_size": 1024,
+        "server_settings": {
+            "jit": "off",  # JIT compile time dominates short OLTP/kNN queries
+            "hnsw.ef_search": "100",
+        },
+    },
 )
 
 AsyncSessionLocal = async_sessionmaker(
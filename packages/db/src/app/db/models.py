@@ -2,11 +2,14 @@ import enum
 from datetime import datetime
 from sqlalchemy import (
     Column, String, Integer, DateTime, ForeignKey, JSON, Float, Text,
-    Enum, Boolean, Index, UniqueConstraint
+    Enum, Boolean, Index, UniqueConstraint, CheckConstraint, LargeBinary, func, text
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.db.base import Base
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
+
+# Naive UTC, same values datetime.utcnow() produced; matches the DDL defaults (migration 007)
+UTC_NOW = text("timezone('utc', now())")
 
 # --- enums ---
 class CaseStatus(str, enum.Enum):
@@ -31,6 +34,14 @@ class RunStatus(str, enum.Enum):
     FAILED = "FAILED"
     ERROR = "ERROR"  # Added for consistency with document processor
 
+def _enum_column(enum_cls: type[enum.Enum]) -> Enum:
+    """Enum stored as VARCHAR + CHECK (see _enum_check) instead of a Postgres ENUM type."""
+    return Enum(enum_cls, native_enum=False, create_constraint=False, length=16)
+
+def _enum_check(column: str, enum_cls: type[enum.Enum], name: str) -> CheckConstraint:
+    values = ", ".join(f"'{member.value}'" for member in enum_cls)
+    return CheckConstraint(f"{column} IN ({values})", name=name)
+
 # --- core tables ---
 class Case(Base):
     __tablename__ = "case"
@@ -39,38 +50,44 @@ class Case(Base):
     source: Mapped[str] = mapped_column(String, nullable=True) # 'upload'/'email'
     filename: Mapped[str] = mapped_column(String, nullable=True)
     email_message_id: Mapped[int] = mapped_column(ForeignKey("email_message.id", ondelete="SET NULL"), nullable=True, index=True)
-    status: Mapped[CaseStatus] = mapped_column(Enum(CaseStatus), default=CaseStatus.NEW, nullable=False)
+    status: Mapped[CaseStatus] = mapped_column(_enum_column(CaseStatus), default=CaseStatus.NEW, nullable=False)
     pre_analysis_status: Mapped[str] = mapped_column(String(20), default="pending", nullable=False, index=True)
     pre_analysis_completed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     missing_requirements: Mapped[dict] = mapped_column(JSON, nullable=True)
     pre_analysis_notes: Mapped[str] = mapped_column(Text, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=func.timezone("utc", func.now()))
 
     runs: Mapped[list["Run"]] = relationship(back_populates="case", cascade="all, delete-orphan")
     email_message: Mapped["EmailMessage"] = relationship(back_populates="cases")
+    __table_args__ = (_enum_check("status", CaseStatus, "ck_case_status"),)
 
 class Run(Base):
     __tablename__ = "run"
     
     id: Mapped[str] = mapped_column(String, primary_key=True)  # uuid str
     case_id: Mapped[str] = mapped_column(ForeignKey("case.id", ondelete="CASCADE"), index=True)
-    component: Mapped[Component] = mapped_column(Enum(Component), nullable=False)
+    component: Mapped[Component] = mapped_column(_enum_column(Component), nullable=False)
     profile: Mapped[str] = mapped_column(String, nullable=True)   # broker profile name
-    status: Mapped[RunStatus] = mapped_column(Enum(RunStatus), default=RunStatus.STARTED)
+    status: Mapped[RunStatus] = mapped_column(_enum_column(RunStatus), default=RunStatus.STARTED)
     metrics: Mapped[dict] = mapped_column(JSON, default=dict)
-    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
     file_name: Mapped[str] = mapped_column(String, nullable=True)  # Added for document processor
     file_s3_uri: Mapped[str] = mapped_column(String, nullable=True)  # Added for document processor
     error_message: Mapped[str] = mapped_column(Text, nullable=True)  # Added for error tracking
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)  # Added for tracking
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)  # Added for tracking
 
     case: Mapped["Case"] = relationship(back_populates="runs")
     rows: Mapped[list["Row"]] = relationship(back_populates="run", cascade="all, delete-orphan")
     codify_results: Mapped[list["Codify"]] = relationship(back_populates="run", cascade="all, delete-orphan")
+    __table_args__ = (
+        _enum_check("component", Component, "ck_run_component"),
+        _enum_check("status", RunStatus, "ck_run_status"),
+    )
 
 Index("ix_run_case_component", Run.case_id, Run.component)
+Index("ix_run_created_at", Run.created_at, postgresql_using="brin", postgresql_with={"pages_per_range": 32})
 
 class Row(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -81,12 +98,14 @@ class Row(Base):
     transformed_data: Mapped[dict] = mapped_column(JSON, nullable=True)  # Normalized for matching
     errors: Mapped[dict] = mapped_column(JSON, default=dict)
     warnings: Mapped[dict] = mapped_column(JSON, default=dict)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=True, onupdate=func.timezone("utc", func.now()))
 
     run: Mapped["Run"] = relationship(back_populates="rows")
     __table_args__ = (UniqueConstraint("run_id", "row_index", name="uq_row_run_idx"),)
 
+Index("ix_row_created_at", Row.created_at, postgresql_using="brin", postgresql_with={"pages_per_range": 32})
+
 class Codify(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     run_id: Mapped[str] = mapped_column(ForeignKey("run.id", ondelete="CASCADE"), index=True)
@@ -107,11 +126,13 @@ class Correction(Base):
     row_idx: Mapped[int] = mapped_column(Integer, index=True)
     from_code: Mapped[str | None] = mapped_column(String, nullable=True)
     to_code: Mapped[str] = mapped_column(String)
-    corrected_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    corrected_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     corrected_by: Mapped[str] = mapped_column(String, nullable=True)
 
     run: Mapped["Run"] = relationship()
 
+Index("ix_correction_corrected_at", Correction.corrected_at, postgresql_using="brin", postgresql_with={"pages_per_range": 32})
+
 # --- email processing tables ---
 class EmailMessage(Base):
     __tablename__ = "email_message"
@@ -120,13 +141,15 @@ class EmailMessage(Base):
     from_email: Mapped[str] = mapped_column(String, nullable=False, index=True)
     subject: Mapped[str] = mapped_column(String, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
-    received_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
-    content_hash: Mapped[str] = mapped_column(String, nullable=False, index=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    received_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    content_hash: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=False, index=True)  # raw SHA-256 digest
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     
     attachments: Mapped[list["EmailAttachment"]] = relationship(back_populates="email_message", cascade="all, delete-orphan")
     cases: Mapped[list["Case"]] = relationship(back_populates="email_message")
 
+Index("ix_email_message_received_at", EmailMessage.received_at, postgresql_using="brin", postgresql_with={"pages_per_range": 32})
+
 class EmailAttachment(Base):
     __tablename__ = "email_attachment"
     
@@ -135,9 +158,9 @@ class EmailAttachment(Base):
     original_name: Mapped[str] = mapped_column(String, nullable=False)
     mime_type: Mapped[str] = mapped_column(String, nullable=False)
     file_size: Mapped[int] = mapped_column(Integer, nullable=False)
-    sha256: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    sha256: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=False, index=True)  # raw SHA-256 digest
     s3_uri: Mapped[str] = mapped_column(String, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     
     email_message: Mapped["EmailMessage"] = relationship(back_populates="attachments")
 
@@ -147,18 +170,37 @@ class AmisRecord(Base):
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     cvegs: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
-    brand: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    brand: Mapped[str] = mapped_column(String, nullable=False)
     model: Mapped[str] = mapped_column(String, nullable=False, index=True)
     year: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
-    body_type: Mapped[str] = mapped_column(String, nullable=True, index=True)
-    use_type: Mapped[str] = mapped_column(String, nullable=True, index=True)
+    body_type: Mapped[str] = mapped_column(String, nullable=True)
+    use_type: Mapped[str] = mapped_column(String, nullable=True)
     description: Mapped[str] = mapped_column(String, nullable=False)
-    embedding: Mapped[Vector] = mapped_column(Vector(384), nullable=True)  # For semantic search
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-
-Index("ix_amis_brand_model_year", AmisRecord.brand, AmisRecord.model, AmisRecord.year)
-Index("ix_amis_description", AmisRecord.description)
+    # Features parsed from description once at ingest (space-separated tokens)
+    transmission: Mapped[str] = mapped_column(String, nullable=True, index=True)
+    fuel_type: Mapped[str] = mapped_column(String, nullable=True, index=True)
+    drivetrain: Mapped[str] = mapped_column(String, nullable=True)
+    engine: Mapped[str] = mapped_column(String, nullable=True)
+    body_style: Mapped[str] = mapped_column(String, nullable=True)
+    equipment: Mapped[str] = mapped_column(String, nullable=True)
+    embedding: Mapped[HALFVEC] = mapped_column(HALFVEC(384), nullable=True)  # FP16, for semantic search
+    text_hash: Mapped[bytes] = mapped_column(LargeBinary(32), nullable=True, index=True)  # sha256 of the embedded text
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=func.timezone("utc", func.now()))
+
+Index(
+    "ix_amis_bmy_covering",
+    AmisRecord.brand, AmisRecord.model, AmisRecord.year,
+    postgresql_include=["cvegs", "description"],
+)
+Index("ix_amis_record_brand_year", AmisRecord.brand, AmisRecord.year)
+Index(
+    "ix_amis_record_embedding_hnsw",
+    AmisRecord.embedding,
+    postgresql_using="hnsw",
+    postgresql_with={"m": 24, "ef_construction": 128},  # as built by migration 008
+    postgresql_ops={"embedding": "halfvec_cosine_ops"},
+)
 
 # Backward compatibility alias for older imports
 AmisCatalog = AmisRecord
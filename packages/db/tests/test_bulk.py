@@ -0,0 +1,68 @@
+import pytest
+
+from app.db import bulk
+from app.db.bulk import AMIS_RECORD_COPY_COLUMNS, bulk_load_amis
+
+
+class FakeConnection:
+    """Records copy_records_to_table calls the way asyncpg receives them"""
+
+    def __init__(self):
+        self.copies = []
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        records = list(records)
+        self.copies.append((table_name, records, list(columns)))
+        return f"COPY {len(records)}"
+
+
+@pytest.fixture
+def registered(monkeypatch):
+    """Stand in for pgvector's codec registration, remembering which connections got it"""
+    connections = []
+
+    async def register_vector(conn):
+        connections.append(conn)
+
+    monkeypatch.setattr(bulk, "register_vector", register_vector)
+    return connections
+
+
+class TestBulkLoadAmis:
+    """Row shaping and result of the binary COPY catalogue loader"""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_copied_in_column_order(self, registered):
+        conn = FakeConnection()
+        rows = [
+            {"cvegs": "A1", "brand": "nissan", "model": "versa", "year": 2020,
+             "description": "versa sense", "transmission": "manual"},
+            {"cvegs": "B2", "brand": "kia", "model": "rio", "year": 2021, "description": "rio lx"},
+        ]
+
+        loaded = await bulk_load_amis(conn, rows)
+
+        assert loaded == 2
+        assert registered == [conn]
+        [(table, records, columns)] = conn.copies
+        assert table == "amis_record"
+        assert columns == list(AMIS_RECORD_COPY_COLUMNS)
+        assert records[0][:4] == ("A1", "nissan", "versa", 2020)
+        assert records[0][columns.index("transmission")] == "manual"
+
+    @pytest.mark.asyncio
+    async def test_missing_keys_are_sent_as_null(self, registered):
+        conn = FakeConnection()
+
+        await bulk_load_amis(conn, [{"cvegs": "A1"}], columns=("cvegs", "brand", "embedding"))
+
+        [(_, records, columns)] = conn.copies
+        assert columns == ["cvegs", "brand", "embedding"]
+        assert records == [("A1", None, None)]
+
+    @pytest.mark.asyncio
+    async def test_empty_input_copies_nothing(self, registered):
+        conn = FakeConnection()
+
+        assert await bulk_load_amis(conn, []) == 0
+        assert conn.copies[0][1] == []
@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
 import logging
-from typing import List, Optional, Dict, Any
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Set, Tuple
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import torch
@@ -14,32 +19,186 @@ class VehicleEmbedder:
     Optimized for Spanish and English vehicle descriptions with feature extraction.
     """
     
-    def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"):
+    def __init__(self,
+                 model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+                 half_precision: bool = True,
+                 max_batch_size: int = 32,
+                 max_batch_delay_ms: float = 5.0,
+                 cache_size: int = 100_000,
+                 compile_model: bool = True,
+                 pipeline_tokenization: bool = True,
+                 prefetch_batches: int = 2):
         """
         Initialize the embedder with a multilingual model.
         
         Args:
             model_name: Name of the sentence transformer model to use
+            half_precision: Run the model in FP16 when a CUDA device is available
+            max_batch_size: Maximum queries coalesced into one forward pass by embed_query_async
+            max_batch_delay_ms: How long embed_query_async waits for more queries before flushing
+            cache_size: Number of embeddings kept in the in-process LRU (0 disables it)
+            compile_model: Compile the transformer forward pass with torch.compile on CUDA
+            pipeline_tokenization: Tokenize upcoming batches on a background thread while the GPU runs the current one
+            prefetch_batches: How many tokenized batches embed_batch keeps in flight ahead of the GPU
         """
         self.model_name = model_name
+        self.half_precision = half_precision
+        self.compile_model = compile_model
         self.model: Optional[SentenceTransformer] = None
+        self._model_lock = threading.Lock()  # flushes may load the model from executor threads
         self.dimension = 384  # Default for MiniLM-L12-v2
         
+        # Micro-batching state for embed_query_async
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay_ms / 1000.0
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: Set[asyncio.Task] = set()  # strong refs so running flushes aren't collected
+        
+        # Content-addressed LRU: digest of the prepared text -> embedding (private copies)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Tokenization pipeline for embed_batch on CUDA (created lazily)
+        self.pipeline_tokenization = pipeline_tokenization
+        self.prefetch_batches = max(1, prefetch_batches)
+        self._tokenizer_pool: Optional[ThreadPoolExecutor] = None
+        
+    @staticmethod
+    def _cache_key(text: str) -> bytes:
+        """Digest of the exact text sent to the model."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    
+    def _cache_get(self, key: bytes) -> Optional[np.ndarray]:
+        """Return a copy of a cached embedding and mark it as recently used."""
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is None:
+                return None
+            self._cache.move_to_end(key)
+        # Callers own what they get back and may modify it in place
+        return embedding.copy()
+    
+    def _cache_put(self, key: bytes, embedding: np.ndarray) -> np.ndarray:
+        """Store a copy of an embedding, evicting the least recently used entry when full."""
+        if self.cache_size <= 0:
+            return embedding
+        stored = embedding.copy()
+        stored.setflags(write=False)
+        with self._cache_lock:
+            self._cache[key] = stored
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return embedding
+    
+    @staticmethod
+    def text_hash(text: str) -> bytes:
+        """SHA-256 of a prepared embedding text, as stored in amis_record.text_hash."""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+    
+    def _encode_one(self, text: str) -> np.ndarray:
+        """Encode a single prepared text, serving repeats from the cache."""
+        key = self._cache_key(text)
+        embedding = self._cache_get(key)
+        if embedding is not None:
+            return embedding
+        
+        with torch.no_grad():
+            embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
+        
+        return self._cache_put(key, embedding.astype(np.float32))
+    
     def _ensure_model_loaded(self):
         """Lazy load the sentence transformer model."""
-        if self.model is None:
+        if self.model is not None:
+            return
+        with self._model_lock:
+            if self.model is not None:
+                return
             logger.info(f"Loading sentence transformer model: {self.model_name}")
-            self.model = SentenceTransformer(self.model_name)
-            self.dimension = self.model.get_sentence_embedding_dimension()
+            model = SentenceTransformer(self.model_name)
+            if self.half_precision and model.device.type == "cuda":
+                # FP16 halves weight/activation bandwidth; outputs are still cast to float32
+                model.half()
+                logger.info("Running sentence transformer in FP16 on CUDA")
+            if self.compile_model and model.device.type == "cuda":
+                self._compile_transformer(model)
+            self.dimension = model.get_sentence_embedding_dimension()
+            # Publish only once fully set up so other threads never see a half-built model
+            self.model = model
             logger.info(f"Model loaded. Embedding dimension: {self.dimension}")
     
+    def _compile_transformer(self, model: SentenceTransformer) -> None:
+        """Swap the Hugging Face encoder for a torch.compile'd version (fused kernels)."""
+        transformer = model[0]
+        if not hasattr(transformer, "auto_model"):
+            return
+        try:
+            # dynamic=True: batch size and sequence length vary per call, avoid recompiling per shape
+            transformer.auto_model = torch.compile(transformer.auto_model, dynamic=True)
+            logger.info("Compiled sentence transformer forward pass with torch.compile")
+        except Exception as e:
+            logger.warning(f"torch.compile unavailable, using eager mode: {e}")
+    
+    def _tokenize(self, texts: List[str]) -> Dict[str, torch.Tensor]:
+        """Tokenize a batch on the tokenizer thread, pinning tensors for async host-to-device copies."""
+        features = self.model.tokenize(texts)
+        return {
+            name: value.pin_memory() if isinstance(value, torch.Tensor) else value
+            for name, value in features.items()
+        }
+    
+    def _forward(self, features: Dict[str, Any]) -> torch.Tensor:
+        """Run a pre-tokenized batch through the model; normalized float32 embeddings stay on device."""
+        device = self.model.device
+        features = {
+            name: value.to(device, non_blocking=True) if isinstance(value, torch.Tensor) else value
+            for name, value in features.items()
+        }
+        with torch.inference_mode():
+            embeddings = self.model(features)["sentence_embedding"]
+            return torch.nn.functional.normalize(embeddings.float(), p=2, dim=1)
+    
+    def _encode_pipelined(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """
+        Encode texts with tokenization overlapped with GPU compute.
+        
+        A background thread tokenizes batch N+1.. while the calling thread runs batch N,
+        keeping at most ``prefetch_batches`` tokenized batches queued. Batch outputs
+        stay on the device and are copied back once, as a single (N, D) matrix.
+        """
+        if self._tokenizer_pool is None:
+            # Exactly one thread: a Hugging Face fast tokenizer is not safe to call
+            # concurrently ("Already borrowed"), and there is only one per model
+            self._tokenizer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed-tokenize")
+        
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        in_flight = deque()
+        next_batch = 0
+        results: List[torch.Tensor] = []
+        
+        while next_batch < len(batches) or in_flight:
+            while next_batch < len(batches) and len(in_flight) < self.prefetch_batches:
+                in_flight.append(self._tokenizer_pool.submit(self._tokenize, batches[next_batch]))
+                next_batch += 1
+            
+            results.append(self._forward(in_flight.popleft().result()))
+            
+            if len(texts) > 100:
+                logger.info(f"Processed {min(len(results) * batch_size, len(texts))}/{len(texts)} embeddings")
+        
+        return torch.cat(results).cpu().numpy()
+    
     def prepare_text_for_embedding(self, 
                                  brand: str,
                                  model: str, 
                                  year: Optional[int] = None,
                                  description: Optional[str] = None,
                                  body: Optional[str] = None,
-                                 use: Optional[str] = None) -> str:
+                                 use: Optional[str] = None,
+                                 features: Optional[Dict[str, List[str]]] = None) -> str:
         """
         Prepare a structured text representation for embedding.
         
@@ -50,6 +209,7 @@ class VehicleEmbedder:
             description: Detailed description
             body: Body type
             use: Intended use
+            features: Features already extracted at ingest (skips re-parsing the description)
             
         Returns:
             Formatted text ready for embedding
@@ -61,44 +221,37 @@ class VehicleEmbedder:
         use = normalize_text(use) if use else ""
         description = normalize_text(description) if description else ""
         
-        # Build structured representation
-        parts = []
+        # Emit tokens straight into one list and join once at the end
+        tokens: List[str] = []
         
         # Core vehicle identification
         if brand and model:
+            tokens += (brand, model)
             if year:
-                parts.append(f"{brand} {model} {year}")
-            else:
-                parts.append(f"{brand} {model}")
+                tokens.append(str(year))
         elif brand:
-            parts.append(brand)
+            tokens.append(brand)
         elif model:
-            parts.append(model)
+            tokens.append(model)
             
         # Add body type and use
         if body:
-            parts.append(f"tipo {body}")
+            tokens += ("tipo", body)
         if use:
-            parts.append(f"uso {use}")
+            tokens += ("uso", use)
             
         # Add detailed description with feature extraction
         if description:
-            # Extract structured features
-            features = extract_vehicle_features(description)
+            # Extract structured features unless they were stored at ingest
+            if features is None:
+                features = extract_vehicle_features(description)
             
-            # Add original description
-            parts.append(description)
-            
-            # Add extracted features as structured text
-            feature_parts = []
-            for feature_type, feature_list in features.items():
-                if feature_list:
-                    feature_parts.append(" ".join(feature_list))
-            
-            if feature_parts:
-                parts.append(" ".join(feature_parts))
+            # Original description followed by the extracted features as structured text
+            tokens.append(description)
+            for feature_list in features.values():
+                tokens.extend(feature_list)
         
-        return " ".join(parts).strip()
+        return " ".join(tokens)
     
     def embed_vehicle(self,
                      brand: str,
@@ -129,29 +282,65 @@ class VehicleEmbedder:
             logger.warning("Empty text for embedding, returning zero vector")
             return np.zeros(self.dimension, dtype=np.float32)
         
-        # Generate embedding
-        with torch.no_grad():
-            embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
-        
-        return embedding.astype(np.float32)
+        return self._encode_one(text)
     
-    def embed_batch(self, vehicles: List[Dict[str, Any]], batch_size: int = 32) -> List[np.ndarray]:
+    def embed_batch(self, vehicles: List[Dict[str, Any]], batch_size: int = 32) -> np.ndarray:
         """
         Generate embeddings for multiple vehicles efficiently.
         
         Args:
             vehicles: List of vehicle dictionaries with keys: brand, model, year, description, body, use
+                and optionally features (pre-extracted, see features_from_columns)
             batch_size: Batch size for processing
             
         Returns:
-            List of embedding vectors
+            Contiguous float32 matrix of shape (len(vehicles), dimension), one row per vehicle
         """
         self._ensure_model_loaded()
         
         if not vehicles:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        
+        return self._embed_texts(self._prepare_texts(vehicles), batch_size)
+    
+    def embed_changed(self,
+                      vehicles: List[Dict[str, Any]],
+                      batch_size: int = 32) -> List[Tuple[int, np.ndarray, bytes]]:
+        """
+        Embed only the vehicles whose prepared text differs from what was last embedded.
+        
+        Each vehicle may carry the ``text_hash`` stored alongside its current embedding;
+        vehicles whose new text hashes to the same value are skipped entirely.
+        
+        Args:
+            vehicles: Vehicle dictionaries as for embed_batch, plus optional text_hash (bytes)
+            batch_size: Batch size for processing
+            
+        Returns:
+            (index into vehicles, embedding, new text_hash) for each changed vehicle
+        """
+        if not vehicles:
+            return []
+        
+        texts = self._prepare_texts(vehicles)
+        hashes = [self.text_hash(text) for text in texts]
+        changed = [
+            i for i, (vehicle, new_hash) in enumerate(zip(vehicles, hashes))
+            if vehicle.get("text_hash") is None or bytes(vehicle["text_hash"]) != new_hash
+        ]
+        
+        if len(vehicles) > 100:
+            logger.info(f"Unchanged embedding texts skipped: {len(vehicles) - len(changed)}/{len(vehicles)}")
+        
+        if not changed:
             return []
         
-        # Prepare all texts
+        self._ensure_model_loaded()
+        embeddings = self._embed_texts([texts[i] for i in changed], batch_size)
+        return [(i, embedding, hashes[i]) for i, embedding in zip(changed, embeddings)]
+    
+    def _prepare_texts(self, vehicles: List[Dict[str, Any]]) -> List[str]:
+        """Build the embedding text for each vehicle dictionary."""
         texts = []
         for vehicle in vehicles:
             text = self.prepare_text_for_embedding(
@@ -160,28 +349,50 @@ class VehicleEmbedder:
                 year=vehicle.get("year"),
                 description=vehicle.get("description"),
                 body=vehicle.get("body"),
-                use=vehicle.get("use")
+                use=vehicle.get("use"),
+                features=vehicle.get("features")
             )
             texts.append(text if text.strip() else " ")  # Avoid empty strings
+        return texts
+    
+    def _embed_texts(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Encode prepared texts into an (N, D) float32 matrix, serving repeats from the cache."""
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        keys = [self._cache_key(text) for text in texts]
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self._cache_get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                embeddings[i] = cached
         
-        # Generate embeddings in batches
-        embeddings = []
-        for i in range(0, len(texts), batch_size):
-            batch_texts = texts[i:i + batch_size]
-            
+        if len(texts) > 100:
+            logger.info(f"Embedding cache hits: {len(texts) - len(misses)}/{len(texts)}")
+        
+        if not misses:
+            return embeddings
+        
+        miss_texts = [texts[i] for i in misses]
+        if self.model.device.type == "cuda" and self.pipeline_tokenization:
+            # Tokenize ahead on a background thread so the GPU is not idle between batches
+            miss_embeddings = self._encode_pipelined(miss_texts, batch_size)
+        else:
             with torch.no_grad():
-                batch_embeddings = self.model.encode(
-                    batch_texts,
-                    batch_size=len(batch_texts),
+                miss_embeddings = self.model.encode(
+                    miss_texts,
+                    batch_size=batch_size,
                     convert_to_numpy=True,
                     normalize_embeddings=True,
-                    show_progress_bar=len(texts) > 100
+                    show_progress_bar=len(misses) > 100
                 )
-            
-            embeddings.extend([emb.astype(np.float32) for emb in batch_embeddings])
-            
-            if len(texts) > 100:
-                logger.info(f"Processed {min(i + batch_size, len(texts))}/{len(texts)} embeddings")
+        
+        # One scatter into the output matrix; the cache keeps its own row copies so the
+        # returned matrix does not pin memory once evicted
+        embeddings[misses] = miss_embeddings
+        if self.cache_size > 0:
+            for i in misses:
+                self._cache_put(keys[i], embeddings[i])
         
         return embeddings
     
@@ -204,24 +415,103 @@ class VehicleEmbedder:
             logger.warning("Empty query for embedding, returning zero vector")
             return np.zeros(self.dimension, dtype=np.float32)
         
-        # Generate embedding
-        with torch.no_grad():
-            embedding = self.model.encode(normalized_query, convert_to_numpy=True, normalize_embeddings=True)
+        return self._encode_one(normalized_query)
+    
+    async def embed_query_async(self, query: str) -> np.ndarray:
+        """
+        Generate a query embedding, coalescing concurrent calls into one forward pass.
+        
+        Queries arriving within ``max_batch_delay_ms`` of each other (up to
+        ``max_batch_size``) are encoded together in a worker thread.
+        
+        Args:
+            query: Search query text
+            
+        Returns:
+            Query embedding vector
+        """
+        normalized_query = normalize_text(query)
         
-        return embedding.astype(np.float32)
+        if not normalized_query.strip():
+            logger.warning("Empty query for embedding, returning zero vector")
+            return np.zeros(self.dimension, dtype=np.float32)
+        
+        cached = self._cache_get(self._cache_key(normalized_query))
+        if cached is not None:
+            return cached
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((normalized_query, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._schedule_flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_batch_delay, self._schedule_flush, loop)
+        
+        return await future
+    
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Hand the pending queries to a flush task and reset the batching window."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = loop.create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Encode a batch of queries off the event loop and resolve their futures."""
+        texts = [text for text, _ in batch]
+        
+        try:
+            # The first flush loads the model; keep that off the event loop too
+            embeddings = await asyncio.get_running_loop().run_in_executor(None, self._encode_texts, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (text, future), embedding in zip(batch, embeddings):
+            embedding = self._cache_put(self._cache_key(text), embedding)
+            if not future.done():
+                future.set_result(embedding)
     
-    def compute_similarity(self, embedding1: np.ndarray, embedding2: np.ndarray) -> float:
+    def _encode_texts(self, texts: List[str]) -> List[np.ndarray]:
+        """Encode already-normalized texts in a single forward pass (loads the model on first use)."""
+        self._ensure_model_loaded()
+        with torch.inference_mode():
+            embeddings = self.model.encode(
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+        return [embedding.astype(np.float32) for embedding in embeddings]
+    
+    def compute_similarity(self,
+                           embedding1: np.ndarray,
+                           embedding2: np.ndarray,
+                           assume_normalized: bool = False) -> float:
         """
         Compute cosine similarity between two embeddings.
         
         Args:
             embedding1: First embedding vector
             embedding2: Second embedding vector
+            assume_normalized: Skip the norm computation; only pass True for unit vectors,
+                such as the embeddings this class returns
             
         Returns:
             Cosine similarity score (0-1)
         """
-        # Normalize vectors (should already be normalized from sentence-transformers)
+        if assume_normalized:
+            return max(0.0, min(1.0, float(np.dot(embedding1, embedding2))))
+        
         norm1 = np.linalg.norm(embedding1)
         norm2 = np.linalg.norm(embedding2)
         
@@ -234,6 +524,21 @@ class VehicleEmbedder:
         # Ensure result is in [0, 1] range
         return max(0.0, min(1.0, float(similarity)))
     
+    def score_batch(self, query: np.ndarray, catalog: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of one normalized query against many normalized embeddings.
+        
+        Args:
+            query: Query embedding, shape (D,)
+            catalog: Candidate embeddings, shape (N, D)
+            
+        Returns:
+            Similarity scores clipped to [0, 1], shape (N,)
+        """
+        # A single matrix-vector product (BLAS gemv) instead of N scalar calls
+        scores = np.asarray(catalog, dtype=np.float32) @ np.asarray(query, dtype=np.float32)
+        return np.clip(scores, 0.0, 1.0)
+    
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings produced by this model."""
         self._ensure_model_loaded()
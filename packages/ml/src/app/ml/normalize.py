@@ -1,9 +1,19 @@
 import re
 import unicodedata
 import pathlib
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 from unidecode import unidecode
 import yaml
+import ahocorasick
+
+# libyaml's C parser when available
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@lru_cache(maxsize=8)
+def _load_yaml_mapping(path: str, mtime_ns: int) -> Dict[str, str]:
+    """Parse a YAML mapping file; mtime_ns is part of the key so edits are picked up."""
+    return yaml.load(pathlib.Path(path).read_text(encoding="utf-8"), Loader=_YAML_LOADER) or {}
 
 def load_abbreviations(path: Optional[pathlib.Path] = None) -> Dict[str, str]:
     """Load abbreviation mappings from YAML file."""
@@ -12,7 +22,8 @@ def load_abbreviations(path: Optional[pathlib.Path] = None) -> Dict[str, str]:
     
     try:
         if path.exists():
-            return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+            # Copy so callers can't mutate the cached parse
+            return dict(_load_yaml_mapping(str(path), path.stat().st_mtime_ns))
     except Exception:
         pass
     
@@ -80,6 +91,67 @@ def load_abbreviations(path: Optional[pathlib.Path] = None) -> Dict[str, str]:
         "trim": "version"
     }
 
+def _compile_abbreviations(abbreviations: Dict[str, str]) -> Tuple[Optional[re.Pattern], Dict[str, int]]:
+    """
+    One alternation over all abbreviations, longest first so longer terms win at a position.
+    
+    Also returns each term's rank in that order, the order in which the original
+    loop substituted them (see _expand_abbreviations).
+    """
+    if not abbreviations:
+        return None, {}
+    terms = sorted(abbreviations, key=len, reverse=True)
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in terms) + r")\b")
+    return pattern, {term: rank for rank, term in enumerate(terms)}
+
+@lru_cache(maxsize=32)
+def _custom_abbreviation_pattern(items: frozenset) -> Tuple[Optional[re.Pattern], Dict[str, str], Dict[str, int]]:
+    mapping = dict(items)
+    pattern, ranks = _compile_abbreviations(mapping)
+    return pattern, mapping, ranks
+
+def _expand_abbreviations(text: str, pattern: re.Pattern, mapping: Dict[str, str],
+                          ranks: Dict[str, int]) -> Tuple[str, int]:
+    """
+    Expand abbreviations in a single pass, with the results of the per-term loop it replaced.
+    
+    That loop ran one re.sub per term, longest first. An expansion ending in a
+    word character glued itself to a term directly after it ("std.abs" ->
+    "estandarabs"), which then had no \b left unless its own, earlier or same,
+    sub had already expanded it. Stored embeddings were built from that text.
+    (Assumes expansions start with a word character, as every shipped one does.)
+    """
+    count = 0
+    prev_end = -1
+    prev_rank = 0
+    
+    def replace(match: re.Match) -> str:
+        nonlocal count, prev_end, prev_rank
+        term = match.group(0)
+        rank = ranks[term]
+        if match.start() == prev_end and rank > prev_rank and _is_word_char(term[0]):
+            prev_end = -1
+            return term
+        
+        expansion = mapping[term]
+        count += 1
+        # Only an expansion ending in a word character takes the next term's boundary away
+        prev_end = match.end() if expansion and _is_word_char(expansion[-1]) else -1
+        prev_rank = rank
+        return expansion
+    
+    return pattern.sub(replace, text), count
+
+# Anything but word chars, hyphens and periods (whitespace included) collapses to one space
+_CLEAN_RE = re.compile(r"[^\w\-\.]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Anything _CLEAN_RE would change in stripped ASCII text
+_NEEDS_CLEAN_RE = re.compile(r"[^\w\-\. ]|  ")
+
+# Default mapping, compiled once at import
+_ABBREV_MAP = load_abbreviations()
+_ABBREV_RE, _ABBREV_RANKS = _compile_abbreviations(_ABBREV_MAP)
+
 def normalize_text(text: str, expand_abbreviations: bool = True, abbreviations: Optional[Dict[str, str]] = None) -> str:
     """
     Normalize text for consistent vehicle description matching.
@@ -95,35 +167,80 @@ def normalize_text(text: str, expand_abbreviations: bool = True, abbreviations:
     if not text or not isinstance(text, str):
         return ""
     
-    # Convert to lowercase and strip
-    text = text.strip().lower()
+    # Catalog fields (brand, model, body, use) repeat heavily; memoize the default-mapping path
+    if abbreviations is None:
+        return _normalize_text_cached(text, expand_abbreviations)
     
-    # Unicode normalization and remove diacritics
-    text = unicodedata.normalize("NFKD", text)
-    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _normalize_text(text, expand_abbreviations, abbreviations)
+
+def normalize_texts(texts: Iterable[Optional[str]],
+                    expand_abbreviations: bool = True,
+                    abbreviations: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Normalize many texts at once (catalogue columns, batch descriptions).
+    
+    Each distinct input is normalized once and the result fanned back out, so
+    heavily repeated values (brands, body types, templated descriptions) cost a
+    dictionary lookup after their first occurrence.
     
-    # Convert non-ASCII to ASCII approximations
-    text = unidecode(text)
+    Args:
+        texts: Input texts; None and non-strings normalize to ""
+        expand_abbreviations: Whether to expand common abbreviations
+        abbreviations: Custom abbreviation mappings (loads default if None)
+    
+    Returns:
+        Normalized strings, in input order
+    """
+    texts = list(texts)
+    unique = dict.fromkeys(text for text in texts if text and isinstance(text, str))
     
-    # Remove special characters except spaces, hyphens, and periods
-    text = re.sub(r"[^\w\s\-\.]", " ", text)
+    if abbreviations is None:
+        normalized = {text: _normalize_text_cached(text, expand_abbreviations) for text in unique}
+    else:
+        normalized = {text: _normalize_text(text, expand_abbreviations, abbreviations) for text in unique}
     
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text).strip()
+    return [normalized.get(text, "") if isinstance(text, str) else "" for text in texts]
+
+@lru_cache(maxsize=50_000)
+def _normalize_text_cached(text: str, expand_abbreviations: bool) -> str:
+    return _normalize_text(text, expand_abbreviations, None)
+
+def _normalize_text(text: str, expand_abbreviations: bool, abbreviations: Optional[Dict[str, str]]) -> str:
+    # Convert to lowercase and strip
+    text = text.strip().lower()
+    
+    if not text:
+        return ""
+    
+    # ASCII input (most catalogue text) is already decomposed and has nothing to transliterate;
+    # when it is also single-spaced with no special characters the cleanup below is a no-op
+    if text.isascii():
+        if _NEEDS_CLEAN_RE.search(text):
+            text = _CLEAN_RE.sub(" ", text).strip()
+    else:
+        # Unicode normalization and remove diacritics
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+        
+        # Convert non-ASCII to ASCII approximations
+        text = unidecode(text)
+        
+        # Remove special characters except hyphens and periods, normalizing whitespace in the same scan
+        text = _CLEAN_RE.sub(" ", text).strip()
     
-    # Expand abbreviations if requested
+    # Expand abbreviations if requested, in a single pass over the text
     if expand_abbreviations:
         if abbreviations is None:
-            abbreviations = load_abbreviations()
+            pattern, mapping, ranks = _ABBREV_RE, _ABBREV_MAP, _ABBREV_RANKS
+        else:
+            pattern, mapping, ranks = _custom_abbreviation_pattern(frozenset(abbreviations.items()))
         
-        # Sort by length (longest first) to avoid partial replacements
-        for abbrev, expansion in sorted(abbreviations.items(), key=lambda x: len(x[0]), reverse=True):
-            # Use word boundaries to avoid partial matches
-            pattern = r"\b" + re.escape(abbrev) + r"\b"
-            text = re.sub(pattern, expansion, text)
-    
-    # Final cleanup
-    text = re.sub(r"\s+", " ", text).strip()
+        if pattern is not None:
+            text, expanded = _expand_abbreviations(text, pattern, mapping, ranks)
+            
+            # Expansions can carry their own spacing; text is already clean otherwise
+            if expanded:
+                text = _WHITESPACE_RE.sub(" ", text).strip()
     
     return text
 
@@ -137,82 +254,130 @@ def extract_vehicle_features(description: str) -> Dict[str, List[str]]:
     Returns:
         Dictionary with extracted features
     """
-    normalized = normalize_text(description)
-    
-    features = {
-        "transmission": [],
-        "fuel_type": [],
-        "drivetrain": [],
-        "engine": [],
-        "body_style": [],
-        "features": []
-    }
+    if not description or not isinstance(description, str):
+        return {feature_type: [] for feature_type in FEATURE_TYPES}
     
-    # Transmission patterns
-    transmission_patterns = {
-        "manual": [r"\bmanual\b", r"\bmt\b", r"\btransmision manual\b"],
-        "automatico": [r"\bautomatico\b", r"\bat\b", r"\btransmision automatica\b"],
-        "cvt": [r"\bcvt\b", r"\btransmision variable continua\b"],
-        "dct": [r"\bdct\b", r"\btransmision doble embrague\b"]
-    }
-    
-    # Fuel type patterns  
-    fuel_patterns = {
-        "gasolina": [r"\bgasolina\b", r"\bgas\b", r"\bpetrol\b"],
-        "diesel": [r"\bdiesel\b", r"\bdies\b"],
-        "electrico": [r"\belectrico\b", r"\belectric\b", r"\bbev\b"],
-        "hibrido": [r"\bhibrido\b", r"\bhybrid\b", r"\bphev\b"]
-    }
+    # Hand out fresh lists so callers can't mutate the cached entry
+    return {feature_type: list(values) for feature_type, values in _extract_vehicle_features_cached(description)}
+
+FEATURE_TYPES = ("transmission", "fuel_type", "drivetrain", "engine", "body_style", "features")
+
+# amis_record column holding each feature type ("features" is a reserved-looking name there)
+FEATURE_COLUMNS = {
+    "transmission": "transmission",
+    "fuel_type": "fuel_type",
+    "drivetrain": "drivetrain",
+    "engine": "engine",
+    "body_style": "body_style",
+    "features": "equipment",
+}
+
+def vehicle_feature_columns(description: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Extract features once at ingest, flattened to one space-separated value per column.
     
-    # Drivetrain patterns
-    drivetrain_patterns = {
-        "traccion_delantera": [r"\bfwd\b", r"\btraccion delantera\b"],
-        "traccion_trasera": [r"\brwd\b", r"\btraccion trasera\b"],
-        "traccion_integral": [r"\b4x4\b", r"\b4wd\b", r"\bawd\b", r"\btraccion integral\b"]
-    }
+    Args:
+        description: Vehicle description text
+        
+    Returns:
+        Mapping of amis_record column name to value (None when nothing was found)
+    """
+    features = extract_vehicle_features(description)
+    return {FEATURE_COLUMNS[feature_type]: " ".join(values) or None for feature_type, values in features.items()}
+
+def features_from_columns(record: Dict[str, Optional[str]]) -> Dict[str, List[str]]:
+    """
+    Rebuild the extract_vehicle_features shape from stored feature columns.
     
-    # Engine patterns
-    engine_patterns = {
-        "v4": [r"\bv4\b", r"\bmotor v4\b"],
-        "v6": [r"\bv6\b", r"\bmotor v6\b"],
-        "v8": [r"\bv8\b", r"\bmotor v8\b"],
-        "turbo": [r"\bturbo\b", r"\bturboalimentado\b"]
-    }
+    Args:
+        record: Row mapping containing the FEATURE_COLUMNS columns
+        
+    Returns:
+        Dictionary with extracted features
+    """
+    return {feature_type: (record.get(column) or "").split() for feature_type, column in FEATURE_COLUMNS.items()}
+
+# Feature literals per feature type: feature name -> whole-word phrases that signal it
+_FEATURE_LITERALS = {
+    "transmission": {
+        "manual": ("manual", "mt", "transmision manual"),
+        "automatico": ("automatico", "at", "transmision automatica"),
+        "cvt": ("cvt", "transmision variable continua"),
+        "dct": ("dct", "transmision doble embrague")
+    },
+    "fuel_type": {
+        "gasolina": ("gasolina", "gas", "petrol"),
+        "diesel": ("diesel", "dies"),
+        "electrico": ("electrico", "electric", "bev"),
+        "hibrido": ("hibrido", "hybrid", "phev")
+    },
+    "drivetrain": {
+        "traccion_delantera": ("fwd", "traccion delantera"),
+        "traccion_trasera": ("rwd", "traccion trasera"),
+        "traccion_integral": ("4x4", "4wd", "awd", "traccion integral")
+    },
+    "engine": {
+        "v4": ("v4", "motor v4"),
+        "v6": ("v6", "motor v6"),
+        "v8": ("v8", "motor v8"),
+        "turbo": ("turbo", "turboalimentado")
+    },
+    "body_style": {
+        "sedan": ("sedan", "cuatro puertas", "4dr"),
+        "hatchback": ("hatchback", "cinco puertas", "5dr"),
+        "suv": ("suv", "vehiculo utilitario deportivo"),
+        "pickup": ("pickup", "camioneta"),
+        "convertible": ("convertible", "cabrio"),
+        "coupe": ("coupe", "dos puertas", "2dr")
+    },
+}
+
+# General features (air conditioning, abs, etc.), matched as plain substrings
+_FEATURE_KEYWORDS = (
+    "aire acondicionado", "sistema antibloqueo", "direccion asistida",
+    "asientos piel", "quemacocos", "rines aleacion", "faros niebla"
+)
+
+def _build_feature_automaton() -> "ahocorasick.Automaton":
+    """One Aho-Corasick automaton over every feature literal: value is (type, name, length, whole_word)."""
+    automaton = ahocorasick.Automaton()
+    for feature_type, literals in _FEATURE_LITERALS.items():
+        for name, phrases in literals.items():
+            for phrase in phrases:
+                automaton.add_word(phrase, (feature_type, name, len(phrase), True))
+    for keyword in _FEATURE_KEYWORDS:
+        automaton.add_word(keyword, ("features", keyword.replace(" ", "_"), len(keyword), False))
+    automaton.make_automaton()
+    return automaton
+
+_FEATURE_AUTOMATON = _build_feature_automaton()
+
+# Declaration order, used to report features deterministically
+_FEATURE_ORDER = {
+    **{feature_type: tuple(literals) for feature_type, literals in _FEATURE_LITERALS.items()},
+    "features": tuple(keyword.replace(" ", "_") for keyword in _FEATURE_KEYWORDS),
+}
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+@lru_cache(maxsize=50_000)
+def _extract_vehicle_features_cached(description: str) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    normalized = normalize_text(description)
     
-    # Body style patterns
-    body_patterns = {
-        "sedan": [r"\bsedan\b", r"\bcuatro puertas\b", r"\b4dr\b"],
-        "hatchback": [r"\bhatchback\b", r"\bcinco puertas\b", r"\b5dr\b"],
-        "suv": [r"\bsuv\b", r"\bvehiculo utilitario deportivo\b"],
-        "pickup": [r"\bpickup\b", r"\bcamioneta\b"],
-        "convertible": [r"\bconvertible\b", r"\bcabrio\b"],
-        "coupe": [r"\bcoupe\b", r"\bdos puertas\b", r"\b2dr\b"]
-    }
+    # Single linear scan for every literal; \b is emulated by checking the neighbouring chars
+    found = {feature_type: set() for feature_type in FEATURE_TYPES}
+    last = len(normalized) - 1
+    for end, (feature_type, name, length, whole_word) in _FEATURE_AUTOMATON.iter(normalized):
+        if whole_word:
+            start = end - length + 1
+            if start > 0 and _is_word_char(normalized[start - 1]):
+                continue
+            if end < last and _is_word_char(normalized[end + 1]):
+                continue
+        found[feature_type].add(name)
     
-    # Extract features using patterns
-    pattern_groups = [
-        (transmission_patterns, "transmission"),
-        (fuel_patterns, "fuel_type"),
-        (drivetrain_patterns, "drivetrain"),
-        (engine_patterns, "engine"),
-        (body_patterns, "body_style")
-    ]
-    
-    for patterns, feature_type in pattern_groups:
-        for feature_name, regexes in patterns.items():
-            for regex in regexes:
-                if re.search(regex, normalized):
-                    features[feature_type].append(feature_name)
-                    break
-    
-    # Extract general features (air conditioning, abs, etc.)
-    feature_keywords = [
-        "aire acondicionado", "sistema antibloqueo", "direccion asistida",
-        "asientos piel", "quemacocos", "rines aleacion", "faros niebla"
-    ]
-    
-    for keyword in feature_keywords:
-        if keyword in normalized:
-            features["features"].append(keyword.replace(" ", "_"))
-    
-    return features
\ No newline at end of file
+    return tuple(
+        (feature_type, tuple(name for name in _FEATURE_ORDER[feature_type] if name in found[feature_type]))
+        for feature_type in FEATURE_TYPES
+    )
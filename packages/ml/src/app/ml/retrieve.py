@@ -4,17 +4,44 @@ import numpy as np
 from sqlalchemy import text, select
 from sqlalchemy.orm import Session
 from sqlalchemy.engine import Engine
-import sys
-import pathlib
-
-# Add packages to path for imports
-sys.path.insert(0, str(pathlib.Path(__file__).parent.parent.parent.parent.parent / "packages" / "db" / "src"))
 
 from app.db.models import AmisCatalog
 from .embed import VehicleEmbedder, get_embedder
 
 logger = logging.getLogger(__name__)
 
+# Physical table behind the AmisCatalog model
+CATALOG_TABLE = AmisCatalog.__tablename__
+
+# Columns returned to callers; never the embedding, which is the bulk of each row
+VEHICLE_COLUMNS = "id, cvegs, brand, model, year, body_type, use_type, description"
+
+# Fixed statements, built once so SQLAlchemy's compiled cache and the driver's
+# prepared statements are reused across calls
+VEHICLE_BY_CVEGS_SQL = text(f"SELECT {VEHICLE_COLUMNS} FROM {CATALOG_TABLE} WHERE cvegs = :cvegs")
+COUNT_VEHICLES_SQL = text(f"SELECT COUNT(*) as total FROM {CATALOG_TABLE}")
+COUNT_EMBEDDED_SQL = text(f"SELECT COUNT(*) as with_embeddings FROM {CATALOG_TABLE} WHERE embedding IS NOT NULL")
+TOP_BRANDS_SQL = text(f"""
+    SELECT brand, COUNT(*) as count 
+    FROM {CATALOG_TABLE} 
+    WHERE brand IS NOT NULL 
+    GROUP BY brand 
+    ORDER BY count DESC 
+    LIMIT 10
+""")
+RECENT_YEARS_SQL = text(f"""
+    SELECT year, COUNT(*) as count 
+    FROM {CATALOG_TABLE} 
+    WHERE year IS NOT NULL 
+    GROUP BY year 
+    ORDER BY year DESC 
+    LIMIT 10
+""")
+
+def _vehicle_records(rows) -> List[Dict[str, Any]]:
+    """Result rows as dictionaries."""
+    return [dict(row._mapping) for row in rows]
+
 class VehicleRetriever:
     """
     Vehicle retrieval service using pgvector for similarity search.
@@ -22,16 +49,27 @@ class VehicleRetriever:
     Provides semantic search over the AMIS vehicle catalogue using embeddings.
     """
     
-    def __init__(self, engine: Engine, embedder: Optional[VehicleEmbedder] = None):
+    def __init__(self, engine: Engine, embedder: Optional[VehicleEmbedder] = None, ef_search: int = 100):
         """
         Initialize the retriever.
         
         Args:
             engine: SQLAlchemy engine for database connection
             embedder: VehicleEmbedder instance (uses global if None)
+            ef_search: HNSW candidate list size per query (recall vs latency)
         """
         self.engine = engine
         self.embedder = embedder or get_embedder()
+        self.ef_search = int(ef_search)
+    
+    def _read_connection(self):
+        """
+        Connection for single-statement reads, in autocommit (no BEGIN/COMMIT round trips).
+        
+        Vector searches keep using ``engine.begin()``: their ``SET LOCAL hnsw.ef_search``
+        only takes effect inside a transaction.
+        """
+        return self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
     
     def create_vector_index(self, session: Session) -> None:
         """
@@ -41,11 +79,12 @@ class VehicleRetriever:
             session: Database session
         """
         try:
-            # Create HNSW index for cosine distance
-            index_sql = """
-            CREATE INDEX IF NOT EXISTS amiscatalog_embedding_cosine_idx 
-            ON amiscatalog USING hnsw (embedding vector_cosine_ops)
-            WITH (m = 16, ef_construction = 64)
+            # Create HNSW index for cosine distance; same definition as the
+            # AmisRecord model and migration 008
+            index_sql = f"""
+            CREATE INDEX IF NOT EXISTS ix_amis_record_embedding_hnsw 
+            ON {CATALOG_TABLE} USING hnsw (embedding halfvec_cosine_ops)
+            WITH (m = 24, ef_construction = 128)
             """
             session.execute(text(index_sql))
             session.commit()
@@ -101,14 +140,15 @@ class VehicleRetriever:
             List of matching vehicles with similarity scores
         """
         with self.engine.begin() as conn:
-            # Convert embedding to pgvector format
-            embedding_str = "[" + ",".join(map(str, embedding)) + "]"
+            # Scoped to this transaction; SET does not accept bind parameters.
+            # The candidate list must comfortably exceed the limit for recall to hold.
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {max(self.ef_search, int(limit) * 4, 40)}"))
             
-            # Build base query with similarity search
+            # Build base query with similarity search; the vector is bound once (see _register_vector_types)
             sql_parts = [
-                "SELECT *,",
-                f"1 - (embedding <=> '{embedding_str}'::vector) as similarity",
-                "FROM amiscatalog",
+                f"SELECT {VEHICLE_COLUMNS},",
+                "1 - (embedding <=> CAST(:embedding AS halfvec)) as similarity",
+                f"FROM {CATALOG_TABLE}",
                 "WHERE embedding IS NOT NULL"
             ]
             
@@ -128,23 +168,24 @@ class VehicleRetriever:
                     params["year_max"] = filters["year_max"]
                 
                 if filters.get("body"):
-                    sql_parts.append("AND body = :body")
+                    sql_parts.append("AND body_type = :body")
                     params["body"] = filters["body"]
                 
                 if filters.get("use"):
-                    sql_parts.append("AND use = :use_type")
+                    sql_parts.append("AND use_type = :use_type")
                     params["use_type"] = filters["use"]
             
             # Add similarity threshold and ordering
             sql_parts.extend([
-                f"AND (1 - (embedding <=> '{embedding_str}'::vector)) >= :min_similarity",
-                "ORDER BY embedding <=> :embedding",
+                # Threshold as a bare distance so it filters the HNSW index scan's output
+                "AND (embedding <=> CAST(:embedding AS halfvec)) <= :max_distance",
+                "ORDER BY embedding <=> CAST(:embedding AS halfvec)",
                 "LIMIT :limit"
             ])
             
             params.update({
-                "min_similarity": min_similarity,
-                "embedding": embedding_str,
+                "max_distance": 1.0 - min_similarity,
+                "embedding": np.asarray(embedding, dtype=np.float32),
                 "limit": limit
             })
             
@@ -153,24 +194,76 @@ class VehicleRetriever:
             result = conn.execute(text(sql), params)
             rows = result.fetchall()
             
-            # Convert to list of dictionaries
-            vehicles = []
-            for row in rows:
-                vehicle_dict = dict(row._mapping)
-                
-                # Parse aliases JSON if present
-                if vehicle_dict.get("aliases"):
-                    import json
-                    try:
-                        vehicle_dict["aliases"] = json.loads(vehicle_dict["aliases"])
-                    except (json.JSONDecodeError, TypeError):
-                        vehicle_dict["aliases"] = {}
-                
-                vehicles.append(vehicle_dict)
+            vehicles = _vehicle_records(rows)
             
             logger.info(f"Found {len(vehicles)} similar vehicles for query (similarity >= {min_similarity})")
             return vehicles
     
+    def knn(self,
+            query: np.ndarray,
+            k: int = 10,
+            filters: Optional[Dict[str, Any]] = None,
+            rerank_candidates: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Top-k catalogue entries by cosine similarity, computed in Postgres.
+        
+        Ordering by the bare ``embedding <=> :query`` operator lets the planner use
+        the HNSW index; brand/year predicates can use the B-tree indexes as a pre-filter.
+        
+        With ``rerank_candidates``, search runs in two stages: a Hamming-distance scan
+        over the binary-quantized index (48 bytes/row) picks that many candidates, which
+        are then reranked exactly on the halfvec column.
+        
+        Args:
+            query: Normalized query embedding
+            k: Number of neighbours to return
+            filters: Optional filters (brand, year_min, year_max)
+            rerank_candidates: Candidate pool size for two-stage search (None = single stage)
+            
+        Returns:
+            List of (cvegs, similarity) tuples, most similar first
+        """
+        conditions = ["embedding IS NOT NULL"]
+        params: Dict[str, Any] = {
+            "query": np.asarray(query, dtype=np.float32),
+            "k": k,
+        }
+        
+        filters = filters or {}
+        if filters.get("brand"):
+            conditions.append("brand = :brand")
+            params["brand"] = filters["brand"]
+        if filters.get("year_min"):
+            conditions.append("year >= :year_min")
+            params["year_min"] = filters["year_min"]
+        if filters.get("year_max"):
+            conditions.append("year <= :year_max")
+            params["year_max"] = filters["year_max"]
+        
+        if rerank_candidates:
+            # The bit expression must match ix_amis_record_embedding_bq_hnsw exactly to use it
+            params["candidates"] = max(rerank_candidates, k)
+            sql = (
+                "WITH candidates AS ("
+                f"SELECT id, embedding FROM {CATALOG_TABLE} WHERE {' AND '.join(conditions)} "
+                "ORDER BY binary_quantize(embedding)::bit(384) <~> binary_quantize(CAST(:query AS halfvec)) "
+                "LIMIT :candidates) "
+                "SELECT cvegs, 1 - (c.embedding <=> CAST(:query AS halfvec)) AS score "
+                f"FROM candidates c JOIN {CATALOG_TABLE} USING (id) "
+                "ORDER BY c.embedding <=> CAST(:query AS halfvec) LIMIT :k"
+            )
+        else:
+            sql = (
+                "SELECT cvegs, 1 - (embedding <=> CAST(:query AS halfvec)) AS score "
+                f"FROM {CATALOG_TABLE} WHERE {' AND '.join(conditions)} "
+                "ORDER BY embedding <=> CAST(:query AS halfvec) LIMIT :k"
+            )
+        
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {max(self.ef_search, params.get('candidates', k))}"))
+            result = conn.execute(text(sql), params)
+            return [(row.cvegs, float(row.score)) for row in result]
+    
     def find_exact_matches(self,
                           brand: str,
                           model: str,
@@ -188,9 +281,9 @@ class VehicleRetriever:
         Returns:
             List of exact matching vehicles
         """
-        with self.engine.begin() as conn:
+        with self._read_connection() as conn:
             # Build query for exact matches
-            sql_parts = ["SELECT * FROM amiscatalog WHERE brand = :brand AND model = :model"]
+            sql_parts = [f"SELECT {VEHICLE_COLUMNS} FROM {CATALOG_TABLE} WHERE brand = :brand AND model = :model"]
             params = {"brand": brand.lower().strip(), "model": model.lower().strip()}
             
             if year:
@@ -198,7 +291,7 @@ class VehicleRetriever:
                 params["year"] = year
             
             if body:
-                sql_parts.append("AND body = :body")
+                sql_parts.append("AND body_type = :body")
                 params["body"] = body.lower().strip()
             
             sql = " ".join(sql_parts)
@@ -206,20 +299,7 @@ class VehicleRetriever:
             result = conn.execute(text(sql), params)
             rows = result.fetchall()
             
-            # Convert to list of dictionaries
-            vehicles = []
-            for row in rows:
-                vehicle_dict = dict(row._mapping)
-                
-                # Parse aliases JSON if present
-                if vehicle_dict.get("aliases"):
-                    import json
-                    try:
-                        vehicle_dict["aliases"] = json.loads(vehicle_dict["aliases"])
-                    except (json.JSONDecodeError, TypeError):
-                        vehicle_dict["aliases"] = {}
-                
-                vehicles.append(vehicle_dict)
+            vehicles = _vehicle_records(rows)
             
             return vehicles
     
@@ -260,37 +340,24 @@ class VehicleRetriever:
         if body:
             filters["body"] = body.lower().strip()
         
-        # High similarity threshold first
-        high_sim_results = self.search_similar_vehicles(
-            query=query,
+        # One search at the lowest threshold; results come back most similar first, so the
+        # rows above each higher threshold are exactly what a search at that threshold returns
+        results = self.search_by_embedding(
+            embedding=self.embedder.embed_query(query),
             limit=limit,
-            min_similarity=0.85,
+            min_similarity=0.5,
             filters=filters
         )
         
+        high_sim_results = [v for v in results if v["similarity"] >= 0.85]
         if high_sim_results:
             return high_sim_results, "high_similarity"
         
-        # Medium similarity threshold
-        med_sim_results = self.search_similar_vehicles(
-            query=query,
-            limit=limit,
-            min_similarity=0.7,
-            filters=filters
-        )
-        
+        med_sim_results = [v for v in results if v["similarity"] >= 0.7]
         if med_sim_results:
             return med_sim_results, "medium_similarity"
         
-        # Low similarity threshold (last resort)
-        low_sim_results = self.search_similar_vehicles(
-            query=query,
-            limit=limit,
-            min_similarity=0.5,
-            filters=filters
-        )
-        
-        return low_sim_results, "low_similarity" if low_sim_results else "no_match"
+        return results, "low_similarity" if results else "no_match"
     
     def get_vehicle_by_cvegs(self, cvegs: str) -> Optional[Dict[str, Any]]:
         """
@@ -302,25 +369,12 @@ class VehicleRetriever:
         Returns:
             Vehicle dictionary or None if not found
         """
-        with self.engine.begin() as conn:
-            result = conn.execute(
-                text("SELECT * FROM amiscatalog WHERE cvegs = :cvegs"),
-                {"cvegs": cvegs}
-            )
+        with self._read_connection() as conn:
+            result = conn.execute(VEHICLE_BY_CVEGS_SQL, {"cvegs": cvegs})
             row = result.fetchone()
             
             if row:
-                vehicle_dict = dict(row._mapping)
-                
-                # Parse aliases JSON if present
-                if vehicle_dict.get("aliases"):
-                    import json
-                    try:
-                        vehicle_dict["aliases"] = json.loads(vehicle_dict["aliases"])
-                    except (json.JSONDecodeError, TypeError):
-                        vehicle_dict["aliases"] = {}
-                
-                return vehicle_dict
+                return _vehicle_records([row])[0]
             
             return None
     
@@ -331,37 +385,23 @@ class VehicleRetriever:
         Returns:
             Dictionary with catalogue statistics
         """
-        with self.engine.begin() as conn:
+        with self._read_connection() as conn:
             stats = {}
             
             # Total vehicles
-            result = conn.execute(text("SELECT COUNT(*) as total FROM amiscatalog"))
+            result = conn.execute(COUNT_VEHICLES_SQL)
             stats["total_vehicles"] = result.fetchone()[0]
             
             # Vehicles with embeddings
-            result = conn.execute(text("SELECT COUNT(*) as with_embeddings FROM amiscatalog WHERE embedding IS NOT NULL"))
+            result = conn.execute(COUNT_EMBEDDED_SQL)
             stats["vehicles_with_embeddings"] = result.fetchone()[0]
             
             # Brand distribution
-            result = conn.execute(text("""
-                SELECT brand, COUNT(*) as count 
-                FROM amiscatalog 
-                WHERE brand IS NOT NULL 
-                GROUP BY brand 
-                ORDER BY count DESC 
-                LIMIT 10
-            """))
+            result = conn.execute(TOP_BRANDS_SQL)
             stats["top_brands"] = [{"brand": row[0], "count": row[1]} for row in result.fetchall()]
             
             # Year distribution
-            result = conn.execute(text("""
-                SELECT year, COUNT(*) as count 
-                FROM amiscatalog 
-                WHERE year IS NOT NULL 
-                GROUP BY year 
-                ORDER BY year DESC 
-                LIMIT 10
-            """))
+            result = conn.execute(RECENT_YEARS_SQL)
             stats["recent_years"] = [{"year": row[0], "count": row[1]} for row in result.fetchall()]
             
             return stats
\ No newline at end of file
@@ -0,0 +1,87 @@
+import random
+import re
+import unicodedata
+
+import pytest
+from unidecode import unidecode
+
+from app.ml.normalize import load_abbreviations, normalize_text, normalize_texts
+
+
+def reference_normalize_text(text, expand_abbreviations=True, abbreviations=None):
+    """The original per-term normalize_text; stored embeddings were built from its output"""
+    if not text or not isinstance(text, str):
+        return ""
+
+    text = text.strip().lower()
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = unidecode(text)
+    text = re.sub(r"[^\w\s\-\.]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+
+    if expand_abbreviations:
+        if abbreviations is None:
+            abbreviations = load_abbreviations()
+        for abbrev, expansion in sorted(abbreviations.items(), key=lambda x: len(x[0]), reverse=True):
+            text = re.sub(r"\b" + re.escape(abbrev) + r"\b", expansion, text)
+
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def random_descriptions(terms, count, seed):
+    """Descriptions stitched from abbreviations, filler words and separators, glued or spaced"""
+    rng = random.Random(seed)
+    words = list(terms) + ["nissan", "versa", "sense", "2020", "Línea", "CAMIÓN", "4p", "1.6l", "x", ""]
+    separators = [" ", "  ", ".", "-", "/", ",", "", "\t", " (", ") "]
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 6)):
+            parts.append(rng.choice(words))
+            parts.append(rng.choice(separators))
+        text = "".join(parts)
+        yield text.upper() if rng.random() < 0.3 else text
+
+
+class TestNormalizeText:
+    """normalize_text must keep producing the text the original implementation did"""
+
+    @pytest.mark.parametrize("text", [
+        "std.abs",
+        "std.auto",
+        "std. abs",
+        "std.std.abs",
+        "STD. A/C 4X4",
+        "sedan w/o a/c w/ abs",
+        "Versa Sense 1.6L Std. 4p",
+        "Camión  Reg Cab   Dies  ",
+        "turbo-v6 awd hback",
+        "l",
+        "",
+    ])
+    def test_known_descriptions_match_reference(self, text):
+        assert normalize_text(text) == reference_normalize_text(text)
+
+    def test_glued_term_after_word_expansion_is_not_expanded(self):
+        assert normalize_text("std.abs") == "estandarabs"
+        assert normalize_text("std. abs") == "estandar. sistema antibloqueo"
+
+    def test_random_descriptions_match_reference(self):
+        texts = list(random_descriptions(load_abbreviations(), 5000, seed=7))
+
+        assert [normalize_text(text) for text in texts] == [reference_normalize_text(text) for text in texts]
+        assert normalize_texts(texts) == [reference_normalize_text(text) for text in texts]
+
+    def test_without_expansion_matches_reference(self):
+        for text in random_descriptions(load_abbreviations(), 500, seed=11):
+            assert normalize_text(text, expand_abbreviations=False) == reference_normalize_text(text, False)
+
+    def test_custom_abbreviations_match_reference(self):
+        custom = {"gl": "gran lujo", "gls": "gran lujo sport", "t.a.": "transmision automatica", "4p": "cuatro puertas"}
+
+        for text in random_descriptions(custom, 2000, seed=3):
+            assert normalize_text(text, abbreviations=custom) == reference_normalize_text(text, abbreviations=custom)
+
+    @pytest.mark.parametrize("value", [None, "", 17, "   "])
+    def test_empty_and_non_string_input(self, value):
+        assert normalize_text(value) == reference_normalize_text(value)
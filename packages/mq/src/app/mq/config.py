@@ -5,7 +5,9 @@ Supports local development, staging, and production environments.
 """
 
 import os
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
 from enum import Enum
 
 
@@ -17,6 +19,27 @@ class QueueEnvironment(str, Enum):
     PRODUCTION = "production"
 
 
+def resolve_environment(environment: Optional[str] = None) -> QueueEnvironment:
+    """
+    Resolve an environment name (or the ENVIRONMENT variable) to a QueueEnvironment.
+    
+    Args:
+        environment: Environment name; falls back to $ENVIRONMENT, then local
+        
+    Returns:
+        Matching QueueEnvironment member
+    """
+    if isinstance(environment, QueueEnvironment):
+        return environment
+    
+    name = environment or os.getenv("ENVIRONMENT") or QueueEnvironment.LOCAL.value
+    try:
+        return QueueEnvironment(name.strip().lower())
+    except ValueError:
+        raise ValueError(f"Unknown environment: {name}. "
+                         f"Supported: {[env.value for env in QueueEnvironment]}") from None
+
+
 class QueueNames:
     """Centralized queue name definitions."""
     # Pre-analysis queue for initial email processing
@@ -35,26 +58,28 @@ class QueueNames:
     EXPORT_DLQ = "mvp-underwriting-export-dlq"
     MATCHING_DLQ = "mvp-underwriting-matching-dlq"
     
+    MAIN_QUEUES: tuple[str, ...] = (PRE_ANALYSIS, EXTRACT, TRANSFORM, EXPORT, MATCHING)
+    ALL_QUEUES: tuple[str, ...] = MAIN_QUEUES + (
+        PRE_ANALYSIS_DLQ, EXTRACT_DLQ, TRANSFORM_DLQ, EXPORT_DLQ, MATCHING_DLQ
+    )
+    
     @classmethod
-    def get_all_queues(cls) -> list[str]:
+    def get_all_queues(cls) -> tuple[str, ...]:
         """Get all queue names."""
-        return [
-            cls.PRE_ANALYSIS, cls.EXTRACT, cls.TRANSFORM, cls.EXPORT, cls.MATCHING,
-            cls.PRE_ANALYSIS_DLQ, cls.EXTRACT_DLQ, cls.TRANSFORM_DLQ, cls.EXPORT_DLQ, cls.MATCHING_DLQ
-        ]
+        return cls.ALL_QUEUES
     
     @classmethod
-    def get_main_queues(cls) -> list[str]:
+    def get_main_queues(cls) -> tuple[str, ...]:
         """Get main processing queue names (excluding DLQ)."""
-        return [cls.PRE_ANALYSIS, cls.EXTRACT, cls.TRANSFORM, cls.EXPORT, cls.MATCHING]
+        return cls.MAIN_QUEUES
 
 
 class QueueConfig:
     """Queue configuration management."""
     
-    # Environment-specific settings
-    ENVIRONMENTS = {
-        QueueEnvironment.LOCAL: {
+    # Environment-specific settings (read-only, shared by every instance)
+    ENVIRONMENTS: Dict[QueueEnvironment, Mapping[str, Any]] = {
+        QueueEnvironment.LOCAL: MappingProxyType({
             "backend": "local",
             "prefix": "",
             "region": None,
@@ -63,8 +88,8 @@ class QueueConfig:
             "retry_attempts": 3,
             "visibility_timeout": 30,
             "message_retention": 3600  # 1 hour for local testing
-        },
-        QueueEnvironment.DEVELOPMENT: {
+        }),
+        QueueEnvironment.DEVELOPMENT: MappingProxyType({
             "backend": "sqs",
             "prefix": "dev-",
             "region": "us-east-1",
@@ -73,8 +98,8 @@ class QueueConfig:
             "retry_attempts": 3,
             "visibility_timeout": 60,
             "message_retention": 86400  # 1 day
-        },
-        QueueEnvironment.STAGING: {
+        }),
+        QueueEnvironment.STAGING: MappingProxyType({
             "backend": "sqs",
             "prefix": "staging-",
             "region": "us-east-1",
@@ -83,8 +108,8 @@ class QueueConfig:
             "retry_attempts": 5,
             "visibility_timeout": 120,
             "message_retention": 259200  # 3 days
-        },
-        QueueEnvironment.PRODUCTION: {
+        }),
+        QueueEnvironment.PRODUCTION: MappingProxyType({
             "backend": "sqs",
             "prefix": "prod-",
             "region": "us-east-1",
@@ -93,7 +118,7 @@ class QueueConfig:
             "retry_attempts": 5,
             "visibility_timeout": 300,  # 5 minutes
             "message_retention": 1209600  # 14 days (SQS maximum)
-        }
+        })
     }
     
     def __init__(self, environment: Optional[str] = None):
@@ -103,16 +128,28 @@ class QueueConfig:
         Args:
             environment: Environment name (local, development, staging, production)
         """
-        self.environment = environment or os.getenv("ENVIRONMENT", QueueEnvironment.LOCAL)
+        self.environment = resolve_environment(environment)
         self.config = self._load_environment_config()
+        
+        # Resolve settings once so the getters are plain attribute reads
+        self._backend: str = self.config["backend"]
+        self._prefix: str = self.config.get("prefix", "")
+        self._region: Optional[str] = self.config.get("region")
+        self._debug: bool = self.config.get("debug", False)
+        self._persistence: bool = self.config.get("persistence", False)
+        self._retry_attempts: int = self.config.get("retry_attempts", 3)
+        self._visibility_timeout: int = self.config.get("visibility_timeout", 30)
+        self._message_retention: int = self.config.get("message_retention", 3600)
+        
+        # Fixed for the lifetime of the instance; read-only view handed to callers
+        self._all_queue_names = MappingProxyType({
+            base_name: self.get_queue_name(base_name)
+            for base_name in QueueNames.ALL_QUEUES
+        })
     
-    def _load_environment_config(self) -> Dict[str, Any]:
+    def _load_environment_config(self) -> Mapping[str, Any]:
         """Load configuration for the current environment."""
-        if self.environment not in self.ENVIRONMENTS:
-            raise ValueError(f"Unknown environment: {self.environment}. "
-                           f"Supported: {list(self.ENVIRONMENTS.keys())}")
-        
-        return self.ENVIRONMENTS[self.environment].copy()
+        return self.ENVIRONMENTS[self.environment]
     
     def get_queue_name(self, base_name: str) -> str:
         """
@@ -124,48 +161,44 @@ class QueueConfig:
         Returns:
             Full queue name with prefix (e.g., 'dev-mvp-underwriting-extract')
         """
-        prefix = self.config.get("prefix", "")
-        return f"{prefix}{base_name}"
+        return f"{self._prefix}{base_name}"
     
-    def get_all_queue_names(self) -> Dict[str, str]:
+    def get_all_queue_names(self) -> Mapping[str, str]:
         """
         Get all queue names with environment prefixes.
         
         Returns:
-            Dictionary mapping base names to full names
+            Read-only mapping of base names to full names
         """
-        return {
-            base_name: self.get_queue_name(base_name)
-            for base_name in QueueNames.get_all_queues()
-        }
+        return self._all_queue_names
     
     def get_backend(self) -> str:
         """Get the queue backend type (local or sqs)."""
-        return self.config["backend"]
+        return self._backend
     
     def get_region(self) -> Optional[str]:
         """Get the AWS region for SQS queues."""
-        return self.config.get("region")
+        return self._region
     
     def is_debug_enabled(self) -> bool:
         """Check if debug mode is enabled."""
-        return self.config.get("debug", False)
+        return self._debug
     
     def get_retry_attempts(self) -> int:
         """Get the number of retry attempts for failed messages."""
-        return self.config.get("retry_attempts", 3)
+        return self._retry_attempts
     
     def get_visibility_timeout(self) -> int:
         """Get the visibility timeout for messages in seconds."""
-        return self.config.get("visibility_timeout", 30)
+        return self._visibility_timeout
     
     def get_message_retention(self) -> int:
         """Get the message retention period in seconds."""
-        return self.config.get("message_retention", 3600)
+        return self._message_retention
     
     def is_persistence_enabled(self) -> bool:
         """Check if message persistence is enabled."""
-        return self.config.get("persistence", False)
+        return self._persistence
     
     def get_dlq_name(self, base_name: str) -> str:
         """
@@ -188,7 +221,7 @@ class QueueConfig:
             Configuration dictionary
         """
         return {
-            "environment": self.environment,
+            "environment": self.environment.value,
             "backend": self.get_backend(),
             "region": self.get_region(),
             "debug": self.is_debug_enabled(),
@@ -196,17 +229,18 @@ class QueueConfig:
             "retry_attempts": self.get_retry_attempts(),
             "visibility_timeout": self.get_visibility_timeout(),
             "message_retention": self.get_message_retention(),
-            "queue_names": self.get_all_queue_names()
+            "queue_names": dict(self.get_all_queue_names())
         }
 
 
-# Global configuration instance
-_config_instance: Optional[QueueConfig] = None
+@lru_cache(maxsize=None)
+def _queue_config_for(environment: QueueEnvironment) -> QueueConfig:
+    return QueueConfig(environment)
 
 
 def get_queue_config(environment: Optional[str] = None) -> QueueConfig:
     """
-    Get the global queue configuration instance.
+    Get the shared queue configuration instance for an environment.
     
     Args:
         environment: Environment name (optional, uses env var if not provided)
@@ -214,18 +248,12 @@ def get_queue_config(environment: Optional[str] = None) -> QueueConfig:
     Returns:
         QueueConfig instance
     """
-    global _config_instance
-    
-    if _config_instance is None or (environment and environment != _config_instance.environment):
-        _config_instance = QueueConfig(environment)
-    
-    return _config_instance
+    return _queue_config_for(resolve_environment(environment))
 
 
 def reset_config():
-    """Reset the global configuration instance (useful for testing)."""
-    global _config_instance
-    _config_instance = None
+    """Reset the cached configuration instances (useful for testing)."""
+    _queue_config_for.cache_clear()
 
 
 # Convenience functions
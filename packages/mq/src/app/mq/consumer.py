@@ -1,39 +1,348 @@
 import asyncio
+import functools
 import json
+import os
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from typing import Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, List, Tuple
 import logging
+import time
+import weakref
 from datetime import datetime
 
 from app.common.config import get_settings
 
+try:
+    import aioboto3
+except ImportError:  # boto3 calls run on worker threads instead
+    aioboto3 = None
+
+try:
+    import orjson
+    
+    _loads = orjson.loads
+    
+    def _dumps(obj: Any) -> str:
+        # SQS message bodies must be str
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _loads = json.loads
+    _dumps = json.dumps
+
 logger = logging.getLogger(__name__)
 
+# boto3 is blocking; give SQS I/O its own pool rather than competing for the loop's
+# default executor, which caps out at min(32, cpu_count + 4) threads.
+SQS_MAX_PARALLEL = int(os.getenv("SQS_MAX_PARALLEL", (os.cpu_count() or 1) * 5))
+
+@functools.lru_cache(maxsize=None)
+def _get_sqs_executor() -> ThreadPoolExecutor:
+    """Thread pool for the boto3 fallback, created on first use (never with aioboto3)"""
+    return ThreadPoolExecutor(max_workers=SQS_MAX_PARALLEL, thread_name_prefix="sqs-io")
+
+# Queue URLs resolved via GetQueueUrl, shared by every consumer/publisher in
+# the process: (region, queue_name) -> url
+_QUEUE_URL_CACHE: Dict[Tuple[str, str], str] = {}
+
+def build_queue_url(region: str, account_id: str, queue_name: str) -> str:
+    """Standard SQS queue URL, for when the account id is known up front"""
+    return f"https://sqs.{region}.amazonaws.com/{account_id}/{queue_name}"
+
+def format_ts(ns: int) -> str:
+    """Format a time.time_ns() timestamp as a local ISO 8601 string"""
+    return datetime.fromtimestamp(ns / 1e9).isoformat()
+
+# SQS batch APIs accept at most 10 entries per call
+SQS_MAX_BATCH_SIZE = 10
+DEFAULT_MAX_BATCH_OPEN_MS = 200
+
+def _sqs_client_config(max_pool_connections: int) -> Config:
+    # The HTTP connection pool has to be as wide as the request concurrency,
+    # otherwise botocore queues requests behind its default 10 connections
+    return Config(
+        max_pool_connections=max_pool_connections,
+        tcp_keepalive=True,
+        retries={'mode': 'adaptive', 'max_attempts': 10},
+    )
+
+def _session_kwargs(region: str) -> Dict[str, Any]:
+    settings = get_settings()
+    return dict(
+        aws_access_key_id=settings.secrets.aws_access_key_id,
+        aws_secret_access_key=settings.secrets.aws_secret_access_key,
+        region_name=region,
+    )
+
+@functools.lru_cache(maxsize=None)
+def _get_sqs_client(region: str, max_pool_connections: int):
+    """boto3 SQS client shared across the process (boto3 clients are thread-safe)"""
+    session = boto3.Session(**_session_kwargs(region))
+    return session.client('sqs', config=_sqs_client_config(max_pool_connections))
+
+@functools.lru_cache(maxsize=None)
+def _get_aioboto3_session(region: str):
+    """aioboto3 session shared across the process; clients are still opened per loop"""
+    return aioboto3.Session(**_session_kwargs(region))
+
+# Open aioboto3 clients, one per (region, pool size) on each event loop:
+# loop -> {(region, max_pool_connections): (client context, client)}
+_AIO_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, int], Tuple[Any, Any]]]" = weakref.WeakKeyDictionary()
+_AIO_CLIENT_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+async def _get_aio_client(region: str, max_pool_connections: int):
+    """aioboto3 SQS client shared by everything on the running loop (it must be opened inside it)"""
+    loop = asyncio.get_running_loop()
+    clients = _AIO_CLIENTS.setdefault(loop, {})
+    key = (region, max_pool_connections)
+    entry = clients.get(key)
+    if entry is None:
+        async with _AIO_CLIENT_LOCKS.setdefault(loop, asyncio.Lock()):
+            entry = clients.get(key)
+            if entry is None:
+                context = _get_aioboto3_session(region).client('sqs', config=_sqs_client_config(max_pool_connections))
+                entry = clients[key] = (context, await context.__aenter__())
+    return entry[1]
+
+async def close_sqs_clients():
+    """Close the aioboto3 clients opened on the running loop; call once on app shutdown"""
+    clients = _AIO_CLIENTS.pop(asyncio.get_running_loop(), {})
+    for context, _ in clients.values():
+        await context.__aexit__(None, None, None)
+
+class _SQSClient:
+    """
+    Awaitable SQS client.
+    
+    With aioboto3 installed every call is a coroutine on the event loop, made through
+    the loop's shared client; without it, the equivalent boto3 call runs in an
+    executor thread.
+    """
+    
+    def __init__(self, region: Optional[str] = None, max_parallel_requests: Optional[int] = None):
+        self.region = region or get_settings().s3_region
+        self._max_parallel = max_parallel_requests or SQS_MAX_PARALLEL
+        
+        self._client = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._owns_executor = False
+        
+        if aioboto3 is None:
+            self._client = _get_sqs_client(self.region, self._max_parallel)
+            if max_parallel_requests:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max_parallel_requests, thread_name_prefix="sqs-io"
+                )
+                self._owns_executor = True
+            else:
+                self._executor = _get_sqs_executor()
+    
+    async def call(self, operation: str, **kwargs) -> Dict[str, Any]:
+        """Invoke an SQS API operation (e.g. 'receive_message') and return its response."""
+        if aioboto3 is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(getattr(self._client, operation), **kwargs))
+        
+        client = await _get_aio_client(self.region, self._max_parallel)
+        return await getattr(client, operation)(**kwargs)
+    
+    async def get_queue_url(self, queue_name: str) -> str:
+        """Resolve a queue URL, calling GetQueueUrl only once per process"""
+        key = (self.region, queue_name)
+        queue_url = _QUEUE_URL_CACHE.get(key)
+        if queue_url is None:
+            response = await self.call('get_queue_url', QueueName=queue_name)
+            queue_url = _QUEUE_URL_CACHE[key] = response['QueueUrl']
+        return queue_url
+    
+    async def close(self):
+        """Shut down any executor owned by this client (shared aioboto3 clients close in close_sqs_clients)."""
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+            self._owns_executor = False
+
+class _BatchBuffer:
+    """
+    Coalesces concurrent single-entry SQS requests into batch API calls.
+    
+    Entries are queued per queue URL; a batch is flushed once it holds
+    SQS_MAX_BATCH_SIZE entries or has been open for max_batch_open_ms. A lone
+    entry with nothing else queued or in flight is sent right away. Each
+    submitter awaits the result for its own entry.
+    """
+    
+    operation: str = ''
+    
+    def __init__(self, sqs: _SQSClient, max_batch_open_ms: int = DEFAULT_MAX_BATCH_OPEN_MS):
+        self._sqs = sqs
+        self._max_batch_open = max_batch_open_ms / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._flush_loops: Dict[str, asyncio.Task] = {}
+        self._in_flight: set = set()
+    
+    async def _submit(self, queue_url: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Queues and flush loops belong to the loop that created them; a
+            # shared buffer used from a new loop (e.g. a later asyncio.run) starts over
+            self._loop = loop
+            self._queues = {}
+            self._flush_loops = {}
+            self._in_flight = set()
+        
+        queue = self._queues.get(queue_url)
+        if queue is None:
+            queue = self._queues[queue_url] = asyncio.Queue()
+            self._flush_loops[queue_url] = asyncio.create_task(self._flush_loop(queue_url, queue))
+        
+        future = loop.create_future()
+        queue.put_nowait((entry, future))
+        return await future
+    
+    async def _flush_loop(self, queue_url: str, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            
+            try:
+                # Let submitters that are already runnable enqueue, then only hold
+                # the batch open if there is actually something to coalesce with
+                await asyncio.sleep(0)
+                deadline = loop.time()
+                if not queue.empty() or self._in_flight:
+                    deadline += self._max_batch_open
+                
+                while len(batch) < SQS_MAX_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            finally:
+                # Don't hold the next batch behind this one's round trip; on close
+                # the partially filled batch still goes out
+                task = asyncio.create_task(self._flush(queue_url, batch))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+    
+    async def _flush(self, queue_url: str, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        entries = []
+        futures = {}
+        for idx, (entry, future) in enumerate(batch):
+            entries.append({**entry, 'Id': str(idx)})
+            futures[str(idx)] = future
+        
+        try:
+            response = await self._sqs.call(self.operation, QueueUrl=queue_url, Entries=entries)
+        except Exception as e:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for result in response.get('Successful', []):
+            future = futures.pop(result['Id'], None)
+            if future is not None and not future.done():
+                future.set_result(result)
+        
+        for failure in response.get('Failed', []):
+            future = futures.pop(failure['Id'], None)
+            if future is not None and not future.done():
+                error = {'Error': {'Code': failure.get('Code'), 'Message': failure.get('Message')}}
+                future.set_exception(ClientError(error, self.operation))
+        
+        # Entries the response didn't account for must not leave their submitters waiting
+        for entry_id, future in futures.items():
+            if not future.done():
+                error = {'Error': {'Code': 'MissingBatchResult', 'Message': f"No result for entry {entry_id}"}}
+                future.set_exception(ClientError(error, self.operation))
+    
+    async def close(self):
+        """Flush whatever is still queued and stop the per-queue flush loops."""
+        if self._loop is not asyncio.get_running_loop():
+            # Nothing was submitted on this loop; anything left belongs to a closed one
+            return
+        
+        for task in self._flush_loops.values():
+            task.cancel()
+        await asyncio.gather(*self._flush_loops.values(), return_exceptions=True)
+        
+        for queue_url, queue in self._queues.items():
+            pending = []
+            while not queue.empty():
+                pending.append(queue.get_nowait())
+            for i in range(0, len(pending), SQS_MAX_BATCH_SIZE):
+                await self._flush(queue_url, pending[i:i + SQS_MAX_BATCH_SIZE])
+        
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        self._queues.clear()
+        self._flush_loops.clear()
+
+class _SendBuffer(_BatchBuffer):
+    operation = 'send_message_batch'
+    
+    async def submit(
+        self,
+        queue_url: str,
+        message_body: str,
+        delay_seconds: int = 0,
+        message_attributes: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Queue a message for SendMessageBatch and return its result entry (with MessageId)"""
+        entry = {'MessageBody': message_body, 'DelaySeconds': delay_seconds}
+        if message_attributes:
+            entry['MessageAttributes'] = message_attributes
+        return await self._submit(queue_url, entry)
+
+class _DeleteBuffer(_BatchBuffer):
+    operation = 'delete_message_batch'
+    
+    async def submit(self, queue_url: str, receipt_handle: str) -> Dict[str, Any]:
+        """Queue a receipt handle for DeleteMessageBatch"""
+        return await self._submit(queue_url, {'ReceiptHandle': receipt_handle})
+
 class SQSConsumer:
-    def __init__(self, queue_name: str, region: Optional[str] = None):
+    def __init__(
+        self,
+        queue_name: str,
+        region: Optional[str] = None,
+        config: Optional[Any] = None,
+        max_parallel_requests: Optional[int] = None,
+        max_batch_open_ms: int = DEFAULT_MAX_BATCH_OPEN_MS,
+        queue_url: Optional[str] = None,
+        account_id: Optional[str] = None
+    ):
         self.settings = get_settings()
         self.queue_name = queue_name
+        self.config = config
+        self.sqs = _SQSClient(region, max_parallel_requests=max_parallel_requests)
+        self._delete_buffer = _DeleteBuffer(self.sqs, max_batch_open_ms)
         
-        session = boto3.Session(
-            aws_access_key_id=self.settings.aws_access_key_id,
-            aws_secret_access_key=self.settings.aws_secret_access_key,
-            region_name=region or self.settings.s3_region,
-        )
-        
-        self.sqs = session.client('sqs')
-        self.queue_url = None
+        # A known URL (or account id) skips the GetQueueUrl round trip entirely
+        if queue_url is None and account_id:
+            queue_url = build_queue_url(self.sqs.region, account_id, queue_name)
+        self.queue_url = queue_url
+    
+    async def close(self):
+        """Flush pending deletes and close the underlying SQS client."""
+        await self._delete_buffer.close()
+        await self.sqs.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
         
     async def _get_queue_url(self) -> str:
         """Get SQS queue URL"""
         if self.queue_url is None:
             try:
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self.sqs.get_queue_url(QueueName=self.queue_name)
-                )
-                self.queue_url = response['QueueUrl']
+                self.queue_url = await self.sqs.get_queue_url(self.queue_name)
             except ClientError as e:
                 logger.error(f"Failed to get queue URL for {self.queue_name}: {e}")
                 raise
@@ -45,46 +354,78 @@ class SQSConsumer:
         handler: Callable[[Dict[str, Any]], None],
         max_messages: int = 10,
         wait_time: int = 20,
-        visibility_timeout: int = 30
+        visibility_timeout: int = 30,
+        prefetch_pipelines: int = 2
     ):
         """Consume messages from SQS queue"""
         queue_url = await self._get_queue_url()
         
         logger.info(f"Starting consumer for queue: {self.queue_name}")
         
+        # Independent long-poll loops: while one pipeline works through its batch
+        # another is already receiving, so one slow batch never idles the queue
+        await asyncio.gather(*(
+            self._poll_loop(queue_url, handler, max_messages, wait_time, visibility_timeout)
+            for _ in range(max(1, prefetch_pipelines))
+        ))
+    
+    async def _poll_loop(
+        self,
+        queue_url: str,
+        handler: Callable[[Dict[str, Any]], None],
+        max_messages: int,
+        wait_time: int,
+        visibility_timeout: int
+    ):
+        """Receive a batch, process it, repeat"""
+        # Right after traffic more messages are likely, so poll briefly; each empty
+        # poll doubles the wait back up to wait_time, so an idle queue costs no more
+        # ReceiveMessage calls than a plain long poll
+        effective_wait = wait_time
+        
         while True:
             try:
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self.sqs.receive_message(
-                        QueueUrl=queue_url,
-                        MaxNumberOfMessages=max_messages,
-                        WaitTimeSeconds=wait_time,
-                        VisibilityTimeoutSeconds=visibility_timeout,
-                        AttributeNames=['All'],
-                        MessageAttributeNames=['All']
-                    )
+                response = await self.sqs.call(
+                    'receive_message',
+                    QueueUrl=queue_url,
+                    MaxNumberOfMessages=max_messages,
+                    WaitTimeSeconds=effective_wait,
+                    VisibilityTimeout=visibility_timeout,
+                    AttributeNames=['All'],
+                    MessageAttributeNames=['All']
                 )
                 
                 messages = response.get('Messages', [])
                 
                 if not messages:
+                    effective_wait = min(wait_time, effective_wait * 2)
                     logger.debug("No messages received, continuing...")
                     continue
                 
-                # Process messages concurrently
-                tasks = []
-                for message in messages:
-                    task = self._process_message(message, handler, queue_url)
-                    tasks.append(task)
+                effective_wait = min(wait_time, 1)
                 
-                await asyncio.gather(*tasks, return_exceptions=True)
+                # Only receive again once this batch is done, so messages are never
+                # leased while waiting behind another batch (their visibility
+                # timeout runs from the moment they are received)
+                await self._process_batch(messages, handler, queue_url)
                 
             except Exception as e:
                 logger.error(f"Error in consumer loop: {e}")
                 await asyncio.sleep(5)  # Back off on error
     
+    async def _process_batch(
+        self,
+        messages: list[Dict[str, Any]],
+        handler: Callable[[Dict[str, Any]], None],
+        queue_url: str
+    ):
+        """Process a received batch"""
+        # Process messages concurrently
+        await asyncio.gather(
+            *(self._process_message(message, handler, queue_url) for message in messages),
+            return_exceptions=True
+        )
+    
     async def _process_message(
         self,
         message: Dict[str, Any],
@@ -97,12 +438,14 @@ class SQSConsumer:
         
         try:
             # Parse message body
-            body = json.loads(message['Body'])
+            body = _loads(message['Body'])
             
             # Add metadata
             body['_message_id'] = message_id
             body['_receipt_handle'] = receipt_handle
-            body['_received_at'] = datetime.now().isoformat()
+            received_ns = time.time_ns()
+            body['_received_at_ns'] = received_ns
+            body['_received_at'] = format_ts(received_ns)  # ISO string, kept for existing handlers
             
             logger.info(f"Processing message {message_id}")
             
@@ -125,46 +468,53 @@ class SQSConsumer:
     async def _delete_message(self, queue_url: str, receipt_handle: str):
         """Delete processed message from queue"""
         try:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None,
-                lambda: self.sqs.delete_message(
-                    QueueUrl=queue_url,
-                    ReceiptHandle=receipt_handle
-                )
-            )
+            await self._delete_buffer.submit(queue_url, receipt_handle)
         except ClientError as e:
             logger.error(f"Failed to delete message: {e}")
 
 class SQSPublisher:
-    def __init__(self, region: Optional[str] = None):
+    def __init__(
+        self,
+        region: Optional[str] = None,
+        max_parallel_requests: Optional[int] = None,
+        max_batch_open_ms: int = DEFAULT_MAX_BATCH_OPEN_MS,
+        account_id: Optional[str] = None
+    ):
         self.settings = get_settings()
-        
-        session = boto3.Session(
-            aws_access_key_id=self.settings.aws_access_key_id,
-            aws_secret_access_key=self.settings.aws_secret_access_key,
-            region_name=region or self.settings.s3_region,
-        )
-        
-        self.sqs = session.client('sqs')
+        self.sqs = _SQSClient(region, max_parallel_requests=max_parallel_requests)
+        self._send_buffer = _SendBuffer(self.sqs, max_batch_open_ms)
+        self._account_id = account_id
         self._queue_urls = {}
     
+    async def close(self):
+        """Flush pending sends and close the underlying SQS client."""
+        await self._send_buffer.close()
+        await self.sqs.close()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
     async def _get_queue_url(self, queue_name: str) -> str:
         """Get SQS queue URL with caching"""
         if queue_name not in self._queue_urls:
+            if self._account_id:
+                self._queue_urls[queue_name] = build_queue_url(self.sqs.region, self._account_id, queue_name)
+                return self._queue_urls[queue_name]
             try:
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self.sqs.get_queue_url(QueueName=queue_name)
-                )
-                self._queue_urls[queue_name] = response['QueueUrl']
+                self._queue_urls[queue_name] = await self.sqs.get_queue_url(queue_name)
             except ClientError as e:
                 logger.error(f"Failed to get queue URL for {queue_name}: {e}")
                 raise
         
         return self._queue_urls[queue_name]
     
+    async def prewarm(self, queue_names: list[str]):
+        """Resolve queue URLs up front, in parallel, so the first send doesn't pay for it"""
+        await asyncio.gather(*(self._get_queue_url(queue_name) for queue_name in queue_names))
+    
     async def send_message(
         self,
         queue_name: str,
@@ -176,19 +526,12 @@ class SQSPublisher:
         queue_url = await self._get_queue_url(queue_name)
         
         try:
-            params = {
-                'QueueUrl': queue_url,
-                'MessageBody': json.dumps(message),
-                'DelaySeconds': delay_seconds
-            }
-            
-            if message_attributes:
-                params['MessageAttributes'] = message_attributes
-            
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.sqs.send_message(**params)
+            # Concurrent sends are coalesced into SendMessageBatch calls
+            response = await self._send_buffer.submit(
+                queue_url,
+                _dumps(message),
+                delay_seconds=delay_seconds,
+                message_attributes=message_attributes
             )
             
             message_id = response['MessageId']
@@ -210,38 +553,33 @@ class SQSPublisher:
         queue_url = await self._get_queue_url(queue_name)
         message_ids = []
         
-        # Split into batches
-        for i in range(0, len(messages), max_batch_size):
-            batch = messages[i:i + max_batch_size]
-            
-            entries = []
-            for idx, message in enumerate(batch):
-                entries.append({
-                    'Id': str(idx),
-                    'MessageBody': json.dumps(message)
-                })
+        # Split into batches; each request gets its own frozen entry list
+        batches = [
+            [
+                {'Id': str(idx), 'MessageBody': _dumps(message)}
+                for idx, message in enumerate(messages[i:i + max_batch_size])
+            ]
+            for i in range(0, len(messages), max_batch_size)
+        ]
+        
+        # Batches are independent, so send them concurrently
+        try:
+            responses = await asyncio.gather(*(
+                self.sqs.call('send_message_batch', QueueUrl=queue_url, Entries=entries)
+                for entries in batches
+            ))
+        except ClientError as e:
+            logger.error(f"Failed to send batch to {queue_name}: {e}")
+            raise
+        
+        for response in responses:
+            # Extract message IDs
+            for result in response.get('Successful', []):
+                message_ids.append(result['MessageId'])
             
-            try:
-                loop = asyncio.get_event_loop()
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self.sqs.send_message_batch(
-                        QueueUrl=queue_url,
-                        Entries=entries
-                    )
-                )
-                
-                # Extract message IDs
-                for result in response.get('Successful', []):
-                    message_ids.append(result['MessageId'])
-                
-                # Log any failures
-                for failure in response.get('Failed', []):
-                    logger.error(f"Failed to send message in batch: {failure}")
-                
-            except ClientError as e:
-                logger.error(f"Failed to send batch to {queue_name}: {e}")
-                raise
+            # Log any failures
+            for failure in response.get('Failed', []):
+                logger.error(f"Failed to send message in batch: {failure}")
         
         logger.info(f"Sent {len(message_ids)} messages to queue {queue_name}")
         return message_ids
@@ -253,9 +591,10 @@ def create_idempotent_message(
     idempotency_key: Optional[str] = None
 ) -> Dict[str, Any]:
     """Create message with idempotency key"""
+    now_ns = time.time_ns()
     return {
         'message_type': message_type,
         'payload': payload,
-        'idempotency_key': idempotency_key or f"{message_type}_{datetime.now().isoformat()}",
-        'created_at': datetime.now().isoformat()
+        'idempotency_key': idempotency_key or f"{message_type}_{now_ns:x}",
+        'created_at': format_ts(now_ns)
     }
\ No newline at end of file
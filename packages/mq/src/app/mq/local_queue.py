@@ -5,22 +5,65 @@ This provides a simple queue interface without external dependencies.
 """
 
 import asyncio
+import itertools
 import logging
+import os
+import random
+import time
 from typing import Dict, Any, Callable, Optional
 from collections import defaultdict, deque
 from datetime import datetime
-import uuid
 
 logger = logging.getLogger(__name__)
 
+# Processed-message entries kept per queue for debugging
+HISTORY_SIZE = int(os.getenv("LOCAL_QUEUE_HISTORY", 1024))
+
 class LocalQueue:
     """In-memory queue for local development"""
     
+    # Exponential backoff with jitter for failed messages
+    MAX_RETRIES = 3
+    RETRY_BASE_DELAY = 1.0
+    RETRY_MAX_DELAY = 30.0
+    RETRY_JITTER = 1.0
+    
     def __init__(self):
-        self.queues = defaultdict(deque)
+        self.queues = defaultdict(asyncio.Queue)
         self.consumers = defaultdict(list)
         self.running = False
-        self.message_history = defaultdict(list)  # For debugging
+        self.message_history = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))  # For debugging
+        self._success_count = defaultdict(int)
+        self._error_count = defaultdict(int)
+        
+        # Timers for delayed sends and retries that haven't fired yet
+        self._scheduled = defaultdict(set)
+        
+        # Message ids only need to be unique within this process
+        self._id_prefix = f"{os.getpid():x}{int(time.time()):x}"
+        self._id_seq = itertools.count()
+    
+    def _enqueue(self, queue_name: str, message: Dict[str, Any]):
+        """Put a message on its queue, waking a waiting consumer"""
+        self.queues[queue_name].put_nowait(message)
+    
+    def _schedule(self, queue_name: str, message: Dict[str, Any], delay: float):
+        """Enqueue a message after delay seconds"""
+        def fire():
+            self._scheduled[queue_name].discard(handle)
+            self._enqueue(queue_name, message)
+        
+        handle = asyncio.get_running_loop().call_later(delay, fire)
+        self._scheduled[queue_name].add(handle)
+    
+    def _schedule_retry(self, queue_name: str, message: Dict[str, Any]):
+        """Hold a failed message back until its backoff delay has passed"""
+        retry_count = message['_retry_count']
+        backoff = min(
+            self.RETRY_MAX_DELAY,
+            self.RETRY_BASE_DELAY * (2 ** retry_count) + random.random() * self.RETRY_JITTER
+        )
+        self._schedule(queue_name, message, backoff)
     
     async def send_message(
         self, 
@@ -29,32 +72,22 @@ class LocalQueue:
         delay_seconds: int = 0
     ) -> str:
         """Send message to local queue"""
-        message_id = str(uuid.uuid4())
+        message_id = f"{self._id_prefix}-{next(self._id_seq):x}"
         message['_message_id'] = message_id
-        message['_sent_at'] = datetime.now().isoformat()
+        sent_ns = time.time_ns()
+        message['_sent_at_ns'] = sent_ns
+        message['_sent_at'] = datetime.fromtimestamp(sent_ns / 1e9).isoformat()  # kept for existing handlers
         
         if delay_seconds > 0:
             # For delayed messages, we'll process them after delay
-            asyncio.create_task(self._delayed_send(queue_name, message, delay_seconds))
+            self._schedule(queue_name, message, delay_seconds)
+            logger.info(f"Scheduled message {message_id} for local queue {queue_name} in {delay_seconds}s")
         else:
-            self.queues[queue_name].append(message)
+            self._enqueue(queue_name, message)
             logger.info(f"Sent message {message_id} to local queue {queue_name}")
-            
-            # Process immediately if consumer is waiting
-            if self.consumers[queue_name]:
-                await self._process_messages(queue_name)
         
         return message_id
     
-    async def _delayed_send(self, queue_name: str, message: Dict[str, Any], delay_seconds: int):
-        """Send delayed message"""
-        await asyncio.sleep(delay_seconds)
-        self.queues[queue_name].append(message)
-        logger.info(f"Sent delayed message {message['_message_id']} to local queue {queue_name}")
-        
-        if self.consumers[queue_name]:
-            await self._process_messages(queue_name)
-    
     async def consume(
         self, 
         queue_name: str, 
@@ -67,74 +100,81 @@ class LocalQueue:
         self.consumers[queue_name].append(handler)
         logger.info(f"Started consumer for local queue {queue_name}")
         
-        # Process any existing messages
-        await self._process_messages(queue_name)
-        
-        # Keep consumer alive
-        while True:
-            await asyncio.sleep(1)
-            if self.queues[queue_name]:
-                await self._process_messages(queue_name)
+        # Wait on the queue instead of polling; run several consumers for concurrency
+        queue = self.queues[queue_name]
+        try:
+            while True:
+                message = await queue.get()
+                try:
+                    await self._process_message(queue_name, handler, message)
+                finally:
+                    queue.task_done()
+        finally:
+            self.consumers[queue_name].remove(handler)
     
-    async def _process_messages(self, queue_name: str):
-        """Process messages in queue"""
-        processed_count = 0
-        max_batch = 10  # Process up to 10 messages at once
-        
-        while (self.queues[queue_name] and 
-               self.consumers[queue_name] and 
-               processed_count < max_batch):
+    async def _process_message(
+        self,
+        queue_name: str,
+        handler: Callable[[Dict[str, Any]], None],
+        message: Dict[str, Any]
+    ):
+        """Process a single message"""
+        try:
+            logger.info(f"Processing message {message.get('_message_id', 'unknown')}")
+            await handler(message)
             
-            message = self.queues[queue_name].popleft()
-            handler = self.consumers[queue_name][0]
+            # Store in history for debugging
+            self._success_count[queue_name] += 1
+            self.message_history[queue_name].append({
+                'message_id': message.get('_message_id'),
+                'processed_at': datetime.now().isoformat(),
+                'status': 'success'
+            })
             
-            try:
-                logger.info(f"Processing message {message.get('_message_id', 'unknown')}")
-                await handler(message)
-                processed_count += 1
-                
-                # Store in history for debugging
-                self.message_history[queue_name].append({
-                    'message': message,
-                    'processed_at': datetime.now().isoformat(),
-                    'status': 'success'
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing message {message.get('_message_id', 'unknown')}: {e}")
-                
-                # Store error in history
-                self.message_history[queue_name].append({
-                    'message': message,
-                    'processed_at': datetime.now().isoformat(),
-                    'status': 'error',
-                    'error': str(e)
-                })
-                
-                # Re-queue message for retry (simple retry logic)
-                if message.get('_retry_count', 0) < 3:
-                    message['_retry_count'] = message.get('_retry_count', 0) + 1
-                    self.queues[queue_name].appendleft(message)
-                    logger.info(f"Re-queued message for retry {message['_retry_count']}/3")
-                else:
-                    logger.error(f"Message failed after 3 retries, discarding")
-                
-                break
+        except Exception as e:
+            logger.error(f"Error processing message {message.get('_message_id', 'unknown')}: {e}")
+            
+            # Store error in history
+            self._error_count[queue_name] += 1
+            self.message_history[queue_name].append({
+                'message_id': message.get('_message_id'),
+                'processed_at': datetime.now().isoformat(),
+                'status': 'error',
+                'error': str(e)
+            })
+            
+            # Retry later with backoff instead of handing it straight back
+            if message.get('_retry_count', 0) < self.MAX_RETRIES:
+                message['_retry_count'] = message.get('_retry_count', 0) + 1
+                self._schedule_retry(queue_name, message)
+                logger.info(f"Scheduled message for retry {message['_retry_count']}/{self.MAX_RETRIES}")
+            else:
+                logger.error(f"Message failed after {self.MAX_RETRIES} retries, discarding")
     
     def get_queue_stats(self, queue_name: str) -> Dict[str, Any]:
         """Get queue statistics for monitoring"""
         return {
             'queue_name': queue_name,
-            'pending_messages': len(self.queues[queue_name]),
+            'pending_messages': self.queues[queue_name].qsize(),
+            'scheduled_messages': len(self._scheduled[queue_name]),
             'active_consumers': len(self.consumers[queue_name]),
-            'total_processed': len([h for h in self.message_history[queue_name] if h['status'] == 'success']),
-            'total_errors': len([h for h in self.message_history[queue_name] if h['status'] == 'error'])
+            'total_processed': self._success_count[queue_name],
+            'total_errors': self._error_count[queue_name]
         }
     
     def clear_queue(self, queue_name: str):
         """Clear all messages from queue (for testing)"""
-        self.queues[queue_name].clear()
+        queue = self.queues[queue_name]
+        while not queue.empty():
+            queue.get_nowait()
+            queue.task_done()
+        
+        for handle in self._scheduled.pop(queue_name, ()):
+            handle.cancel()
+        
         self.message_history[queue_name].clear()
+        self._success_count.pop(queue_name, None)
+        self._error_count.pop(queue_name, None)
         logger.info(f"Cleared queue {queue_name}")
 
 # Global instance
@@ -8,11 +8,15 @@ import os
 import logging
 from typing import Dict, Any, Callable, Optional
 from .local_queue import local_queue
-from .consumer import SQSConsumer, SQSPublisher
+from .consumer import SQSConsumer, SQSPublisher, close_sqs_clients
 from .config import get_queue_config, QueueNames, is_local_environment, is_sqs_environment
 
 logger = logging.getLogger(__name__)
 
+# SQS publishers are long-lived (they own a batching buffer), so one per region
+# is shared by every caller in the process: region -> publisher
+_sqs_publishers: Dict[str, SQSPublisher] = {}
+
 class QueueFactory:
     """Factory to create appropriate queue based on environment"""
     
@@ -25,8 +29,12 @@ class QueueFactory:
         
         if backend == "local":
             return LocalPublisher()
-        else:
-            return SQSPublisher(region=config.get_region())
+        
+        region = config.get_region()
+        publisher = _sqs_publishers.get(region)
+        if publisher is None:
+            publisher = _sqs_publishers[region] = SQSPublisher(region=region)
+        return publisher
     
     @staticmethod
     def get_consumer(queue_name: str):
@@ -44,6 +52,15 @@ class QueueFactory:
         else:
             return SQSConsumer(full_queue_name, region=config.get_region(), config=config)
     
+    @staticmethod
+    async def shutdown():
+        """Flush shared publishers and release SQS connections; call from the app's shutdown hook"""
+        publishers = list(_sqs_publishers.values())
+        _sqs_publishers.clear()
+        for publisher in publishers:
+            await publisher.close()
+        await close_sqs_clients()
+    
     @staticmethod
     def get_queue_name(base_name: str) -> str:
         """Get the full queue name with environment prefix"""
@@ -60,7 +77,7 @@ class QueueFactory:
     def list_all_queues() -> Dict[str, str]:
         """List all available queues with their full names"""
         config = get_queue_config()
-        return config.get_all_queue_names()
+        return dict(config.get_all_queue_names())
 
 class LocalPublisher:
     """Local message publisher using in-memory queue"""
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.mq.consumer import SQS_MAX_BATCH_SIZE, _SendBuffer
+
+QUEUE_URL = "https://sqs.us-east-1.amazonaws.com/123456789012/test-queue"
+
+
+class FakeSQS:
+    """Records SendMessageBatch calls; bodies listed in fail_bodies come back as Failed"""
+
+    def __init__(self, fail_bodies=(), error=None, drop_bodies=(), bogus_ids=()):
+        self.calls = []
+        self.fail_bodies = set(fail_bodies)
+        self.error = error
+        # drop_bodies get no result at all; bogus_ids are extra results for unknown entries
+        self.drop_bodies = set(drop_bodies)
+        self.bogus_ids = list(bogus_ids)
+
+    async def call(self, operation, QueueUrl, Entries):
+        self.calls.append((operation, QueueUrl, [entry['MessageBody'] for entry in Entries]))
+        if self.error is not None:
+            raise self.error
+        return {
+            'Successful': [
+                {'Id': entry['Id'], 'MessageId': f"id-{entry['MessageBody']}"}
+                for entry in Entries
+                if entry['MessageBody'] not in self.fail_bodies | self.drop_bodies
+            ] + [{'Id': bogus_id, 'MessageId': 'id-bogus'} for bogus_id in self.bogus_ids],
+            'Failed': [
+                {'Id': entry['Id'], 'Code': 'InvalidMessageContents', 'Message': 'rejected'}
+                for entry in Entries if entry['MessageBody'] in self.fail_bodies
+            ],
+        }
+
+
+class TestBatchBuffer:
+    """Batching, partial failure and close behaviour of the SQS batch buffers"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_submits_are_batched(self):
+        sqs = FakeSQS()
+        buffer = _SendBuffer(sqs, max_batch_open_ms=50)
+
+        bodies = [str(i) for i in range(SQS_MAX_BATCH_SIZE + 5)]
+        results = await asyncio.gather(*(buffer.submit(QUEUE_URL, body) for body in bodies))
+
+        assert [result['MessageId'] for result in results] == [f"id-{body}" for body in bodies]
+        assert [len(sent) for _, _, sent in sqs.calls] == [SQS_MAX_BATCH_SIZE, 5]
+        assert all(operation == 'send_message_batch' for operation, _, _ in sqs.calls)
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_lone_submit_is_not_held_for_the_batch_window(self):
+        sqs = FakeSQS()
+        buffer = _SendBuffer(sqs, max_batch_open_ms=10_000)
+
+        result = await asyncio.wait_for(buffer.submit(QUEUE_URL, "only"), timeout=1)
+
+        assert result['MessageId'] == "id-only"
+        assert len(sqs.calls) == 1
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_partial_failure_only_fails_rejected_entries(self):
+        sqs = FakeSQS(fail_bodies={"bad"})
+        buffer = _SendBuffer(sqs, max_batch_open_ms=50)
+
+        results = await asyncio.gather(
+            buffer.submit(QUEUE_URL, "good-1"),
+            buffer.submit(QUEUE_URL, "bad"),
+            buffer.submit(QUEUE_URL, "good-2"),
+            return_exceptions=True
+        )
+
+        assert len(sqs.calls) == 1
+        assert results[0]['MessageId'] == "id-good-1"
+        assert results[2]['MessageId'] == "id-good-2"
+        assert isinstance(results[1], ClientError)
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_request_error_fails_every_entry_in_the_batch(self):
+        sqs = FakeSQS(error=RuntimeError("connection reset"))
+        buffer = _SendBuffer(sqs, max_batch_open_ms=50)
+
+        results = await asyncio.gather(
+            buffer.submit(QUEUE_URL, "a"),
+            buffer.submit(QUEUE_URL, "b"),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_unmatched_results_do_not_strand_submitters(self):
+        sqs = FakeSQS(drop_bodies={"lost"}, bogus_ids=["99"])
+        buffer = _SendBuffer(sqs, max_batch_open_ms=50)
+
+        results = await asyncio.wait_for(asyncio.gather(
+            buffer.submit(QUEUE_URL, "kept"),
+            buffer.submit(QUEUE_URL, "lost"),
+            return_exceptions=True
+        ), timeout=1)
+
+        assert results[0]['MessageId'] == "id-kept"
+        assert isinstance(results[1], ClientError)
+        await buffer.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_open_batch_and_stops_flush_loops(self):
+        sqs = FakeSQS()
+        buffer = _SendBuffer(sqs, max_batch_open_ms=10_000)
+
+        submits = [asyncio.create_task(buffer.submit(QUEUE_URL, str(i))) for i in range(3)]
+        await asyncio.sleep(0.01)
+        assert sqs.calls == []  # still inside the batch window
+        flush_loops = list(buffer._flush_loops.values())
+
+        await asyncio.wait_for(buffer.close(), timeout=1)
+
+        results = await asyncio.gather(*submits)
+        assert [result['MessageId'] for result in results] == ["id-0", "id-1", "id-2"]
+        assert all(task.done() for task in flush_loops)
+        assert buffer._flush_loops == {}
@@ -1,14 +1,35 @@
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from .utils import parse_expr, parse_norm_ops
 
 class Mapping(BaseModel):
     """Column mapping and normalization configuration."""
     columns: Dict[str, str]            # input header -> canonical
     normalize: Dict[str, str] = {}     # e.g. brand: "lower, strip, deburr"
+    
+    _compiled_normalize: Dict[str, FrozenSet[str]] = PrivateAttr(default_factory=dict)
+    
+    def model_post_init(self, __context: Any) -> None:
+        self._compiled_normalize = {col: parse_norm_ops(ops) for col, ops in self.normalize.items()}
+    
+    @property
+    def compiled_normalize(self) -> Dict[str, FrozenSet[str]]:
+        """Normalization op sets per column, parsed once at load time."""
+        return self._compiled_normalize
 
 class Compute(BaseModel):
     """Computed column configuration."""
     add_columns: Dict[str, str] = {}   # new_col: "concat({brand}, ' ', {model})"
+    
+    _compiled_add_columns: Dict[str, Optional[Tuple[str, ...]]] = PrivateAttr(default_factory=dict)
+    
+    def model_post_init(self, __context: Any) -> None:
+        self._compiled_add_columns = {col: parse_expr(expr) for col, expr in self.add_columns.items()}
+    
+    @property
+    def compiled_add_columns(self) -> Dict[str, Optional[Tuple[str, ...]]]:
+        """Parsed expression templates per new column (see parse_expr)."""
+        return self._compiled_add_columns
 
 class Validate(BaseModel):
     """Validation rules for transformed data."""
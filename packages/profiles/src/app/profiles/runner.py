@@ -2,12 +2,15 @@ import re
 import pandas as pd
 from typing import Tuple, Dict
 from .dsl import Profile
-from .utils import apply_norm, render_expr
+from .utils import apply_norm, render_expr_column
 
 def apply_profile(df: pd.DataFrame, profile: Profile) -> Tuple[pd.DataFrame, Dict]:
     """
     Apply a broker profile to transform raw data to canonical format.
     
+    The input DataFrame is not modified. The result shares column data with
+    it until a column is replaced, so no up-front copy is made.
+    
     Args:
         df: Raw input DataFrame
         profile: Profile configuration
@@ -15,11 +18,10 @@ def apply_profile(df: pd.DataFrame, profile: Profile) -> Tuple[pd.DataFrame, Dic
     Returns:
         Tuple of (transformed_df, report_dict)
     """
-    out = df.copy()
     errors = {}
     
     # 1) Header normalization (lower/strip)
-    out.columns = [c.strip().lower() for c in out.columns]
+    out = df.rename(columns=lambda c: c.strip().lower(), copy=False)
     
     # 2) Detection - check required headers exist
     req = profile.detect.get("required_headers", [])
@@ -36,20 +38,18 @@ def apply_profile(df: pd.DataFrame, profile: Profile) -> Tuple[pd.DataFrame, Dic
         for src, dst in profile.mapping.columns.items() 
         if src.lower() in out.columns
     }
-    out = out.rename(columns=rename)
+    out = out.rename(columns=rename, copy=False)
     
     # 4) Normalize fields according to rules
-    for col, ops in (profile.mapping.normalize or {}).items():
+    for col, ops in profile.mapping.compiled_normalize.items():
         if col in out.columns:
             out[col] = apply_norm(out[col], ops)
     
     # 5) Compute new columns from expressions
     if profile.compute:
+        compiled = profile.compute.compiled_add_columns
         for new_col, expr in (profile.compute.add_columns or {}).items():
-            out[new_col] = out.apply(
-                lambda r: render_expr(expr, r.to_dict()), 
-                axis=1
-            )
+            out[new_col] = render_expr_column(expr, out, compiled.get(new_col))
     
     # 6) Validation
     v_err = {}
@@ -65,24 +65,23 @@ def apply_profile(df: pd.DataFrame, profile: Profile) -> Tuple[pd.DataFrame, Dic
         # Range validation
         for col, rng in (profile.validate.ranges or {}).items():
             if col in out.columns:
-                bad_indices = []
-                
                 # Check if values are numeric (4-digit years)
-                non_numeric = out[~out[col].astype(str).str.fullmatch(r"\\d{4}")].index.tolist()
-                bad_indices.extend(non_numeric)
+                bad_mask = ~out[col].astype(str).str.fullmatch(r"\\d{4}")
+                
+                # Non-numeric values coerce to NaN and never compare true;
+                # they are already flagged above
+                values = pd.to_numeric(out[col], errors="coerce")
                 
                 # Check minimum range
                 if "min" in rng:
-                    below_min = out[out[col].astype(float) < rng["min"]].index.tolist()
-                    bad_indices.extend(below_min)
+                    bad_mask |= values < rng["min"]
                 
                 # Check maximum range
                 if "max" in rng:
-                    above_max = out[out[col].astype(float) > rng["max"]].index.tolist()
-                    bad_indices.extend(above_max)
+                    bad_mask |= values > rng["max"]
                 
-                if bad_indices:
-                    v_err[f"{col}_range"] = sorted(set(map(int, bad_indices)))
+                if bad_mask.any():
+                    v_err[f"{col}_range"] = sorted(set(map(int, out.index[bad_mask])))
         
         # Enum validation
         for col, valid_vals in (profile.validate.enums or {}).items():
@@ -1,6 +1,8 @@
 import unicodedata
 import re
 import string
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple, Union
 import pandas as pd
 
 def deburr(s: str) -> str:
@@ -16,18 +18,36 @@ def deburr(s: str) -> str:
     s = unicodedata.normalize("NFKD", s)
     return "".join(ch for ch in s if not unicodedata.combining(ch))
 
-def apply_norm(series: pd.Series, ops: str) -> pd.Series:
+@lru_cache(maxsize=1)
+def _combining_table() -> dict:
+    """str.translate table deleting every combining character (what deburr filters out)."""
+    return {cp: None for cp in range(0x110000) if unicodedata.combining(chr(cp))}
+
+def parse_norm_ops(ops: str) -> FrozenSet[str]:
+    """
+    Parse a normalization spec into its set of operations.
+    
+    Args:
+        ops: Comma-separated list of operations (strip, lower, deburr)
+        
+    Returns:
+        Set of operation names
+    """
+    return frozenset(o.strip() for o in ops.split(","))
+
+def apply_norm(series: pd.Series, ops: Union[str, FrozenSet[str]]) -> pd.Series:
     """
     Apply normalization operations to a pandas Series.
     
     Args:
         series: Input pandas Series
-        ops: Comma-separated list of operations (strip, lower, deburr)
+        ops: Operations from parse_norm_ops, or the comma-separated spec itself
         
     Returns:
         Normalized pandas Series
     """
-    ops = [o.strip() for o in ops.split(",")]
+    if isinstance(ops, str):
+        ops = parse_norm_ops(ops)
     s = series.astype(str)
     
     if "strip" in ops:
@@ -35,10 +55,17 @@ def apply_norm(series: pd.Series, ops: str) -> pd.Series:
     if "lower" in ops:
         s = s.str.lower()
     if "deburr" in ops:
-        s = s.map(deburr)
+        # Same result as s.map(deburr), using column-wide string methods
+        s = s.str.normalize("NFKD").str.translate(_combining_table())
         
     return s
 
+@lru_cache(maxsize=256)
+def _compile_expr(expr: str) -> string.Template:
+    """Build the string.Template for an expression once per distinct expression."""
+    # Replace {var} with ${var} for string.Template
+    return string.Template(expr.replace("{", "${"))
+
 def render_expr(expr: str, row: dict) -> str:
     """
     Render an expression template with row data.
@@ -52,8 +79,69 @@ def render_expr(expr: str, row: dict) -> str:
     Returns:
         Rendered string
     """
-    # Replace {var} with ${var} for string.Template
-    t = string.Template(expr.replace("{", "${"))
-    
     # Substitute with safe handling of None values
-    return t.safe_substitute({k: "" if v is None else str(v) for k, v in row.items()})
\ No newline at end of file
+    return _compile_expr(expr).safe_substitute({k: _render_value(v) for k, v in row.items()})
+
+def _render_value(value) -> str:
+    """How render_expr writes a single field: None is empty, anything else is str()."""
+    return "" if value is None else str(value)
+
+_PLACEHOLDER_RE = re.compile(r"\{([_a-zA-Z][_a-zA-Z0-9]*)\}")
+
+def parse_expr(expr: str) -> Optional[Tuple[str, ...]]:
+    """
+    Split an expression template into literal segments and placeholder names.
+    
+    Args:
+        expr: Template expression
+        
+    Returns:
+        Alternating (literal, field, literal, ..., literal) tuple, or None when
+        the template needs string.Template's "$" handling
+    """
+    if "$" in expr:
+        return None
+    
+    # Literal braces come out of render_expr as "${", do the same here
+    parts = _PLACEHOLDER_RE.split(expr)
+    parts[::2] = [literal.replace("{", "${") for literal in parts[::2]]
+    return tuple(parts)
+
+def render_expr_column(
+    expr: str,
+    df: pd.DataFrame,
+    parts: Optional[Tuple[str, ...]] = None
+) -> pd.Series:
+    """
+    Render an expression template for every row of a DataFrame at once.
+    
+    Same templates and output as render_expr applied row by row, but built
+    from whole-column string concatenation instead of one substitution per row.
+    
+    Args:
+        expr: Template expression
+        df: DataFrame providing the placeholder columns
+        parts: parse_expr(expr), if already parsed
+        
+    Returns:
+        Series of rendered strings aligned with df.index
+    """
+    if parts is None:
+        parts = parse_expr(expr)
+    # "$" has its own meaning in string.Template; and when every column is numeric or
+    # datetime, rows come out upcast to a common dtype (ints render as "2020.0").
+    # Both keep the row-wise path
+    if parts is None or (len(df) and df.iloc[0].dtype.kind in "biufcmM"):
+        return df.apply(lambda r: render_expr(expr, r.to_dict()), axis=1)
+    
+    result = pd.Series(parts[0], index=df.index, dtype=object)
+    for i in range(1, len(parts), 2):
+        field, literal = parts[i], parts[i + 1]
+        if field in df.columns:
+            col = df[field]
+            result = result + col.map(_render_value) + literal
+        else:
+            # Unknown placeholders are left in place, as safe_substitute does
+            result = result + "${" + field + "}" + literal
+    
+    return result
\ No newline at end of file
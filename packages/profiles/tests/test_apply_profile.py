@@ -0,0 +1,158 @@
+import string
+import unicodedata
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.profiles.dsl import Profile
+from app.profiles.runner import apply_profile
+
+
+def reference_apply_profile(df, profile):
+    """The original row-wise apply_profile; canonical rows already stored came from it"""
+
+    def deburr(s):
+        s = unicodedata.normalize("NFKD", s)
+        return "".join(ch for ch in s if not unicodedata.combining(ch))
+
+    def apply_norm(series, ops):
+        ops = [o.strip() for o in ops.split(",")]
+        s = series.astype(str)
+        if "strip" in ops:
+            s = s.str.strip()
+        if "lower" in ops:
+            s = s.str.lower()
+        if "deburr" in ops:
+            s = s.map(deburr)
+        return s
+
+    def render_expr(expr, row):
+        t = string.Template(expr.replace("{", "${"))
+        return t.safe_substitute({k: "" if v is None else str(v) for k, v in row.items()})
+
+    out = df.copy()
+    out.columns = [c.strip().lower() for c in out.columns]
+
+    missing = [h for h in profile.detect.get("required_headers", []) if h not in out.columns]
+    if missing:
+        return out, {"errors": {"missing_headers": missing}, "metrics": {"rows": len(out)}}
+
+    rename = {src.lower(): dst for src, dst in profile.mapping.columns.items() if src.lower() in out.columns}
+    out = out.rename(columns=rename)
+
+    for col, ops in (profile.mapping.normalize or {}).items():
+        if col in out.columns:
+            out[col] = apply_norm(out[col], ops)
+
+    if profile.compute:
+        for new_col, expr in (profile.compute.add_columns or {}).items():
+            out[new_col] = out.apply(lambda r: render_expr(expr, r.to_dict()), axis=1)
+
+    v_err = {}
+    if profile.validate:
+        missing_canonical = [c for c in (profile.validate.required or []) if c not in out.columns]
+        if missing_canonical:
+            v_err["missing_canonical"] = missing_canonical
+
+        for col, rng in (profile.validate.ranges or {}).items():
+            if col in out.columns:
+                bad_indices = out[~out[col].astype(str).str.fullmatch(r"\\d{4}")].index.tolist()
+                if "min" in rng:
+                    bad_indices.extend(out[out[col].astype(float) < rng["min"]].index.tolist())
+                if "max" in rng:
+                    bad_indices.extend(out[out[col].astype(float) > rng["max"]].index.tolist())
+                if bad_indices:
+                    v_err[f"{col}_range"] = sorted(set(map(int, bad_indices)))
+
+        for col, valid_vals in (profile.validate.enums or {}).items():
+            if col in out.columns:
+                invalid_indices = out[~out[col].isin(valid_vals)].index.tolist()
+                if invalid_indices:
+                    v_err[f"{col}_enum"] = invalid_indices
+
+    metrics = {"rows": len(out)}
+    if v_err:
+        metrics["validation_errors"] = {k: len(v) if isinstance(v, list) else v for k, v in v_err.items()}
+
+    return out, {"errors": v_err, "metrics": metrics}
+
+
+PROFILE = Profile(
+    detect={"required_headers": ["marca", "modelo"]},
+    mapping={
+        "columns": {"Marca": "brand", "Modelo": "model", "Año": "year", "Uso": "use", "Descripción": "description"},
+        "normalize": {"brand": "lower, strip, deburr", "model": "strip", "use": "lower"},
+    },
+    compute={"add_columns": {
+        "label": "{brand} {model} {year}",
+        "key": "{brand}-{year}-{missing}",
+        "priced": "$ {brand} {{model}}",
+    }},
+    validate={
+        "required": ["brand", "model", "year", "vin"],
+        "ranges": {"year": {"min": 1990, "max": 2025}},
+        "enums": {"use": ["particular", "comercial"]},
+    },
+)
+
+
+def raw_frame():
+    return pd.DataFrame({
+        " Marca ": [" NISSAN ", "Citroën", "kia", None, "Peugeot"],
+        "MODELO": ["Versa ", " C3", None, "Rio", "208"],
+        "año": [2020, 1985, 2031, np.nan, 2024],
+        "Uso": ["Particular", "COMERCIAL", "carga", None, "particular"],
+        "Descripción": ["versa sense", "c3 feel", "", None, "208 active"],
+        "Fecha": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01", "2024-04-01", "2024-05-01"]),
+    }, index=[10, 11, 12, 13, 14])
+
+
+class TestApplyProfile:
+    """apply_profile must produce the frame and report the original implementation did"""
+
+    def assert_same_as_reference(self, df, profile):
+        expected_df, expected_report = reference_apply_profile(df.copy(), profile)
+
+        out, report = apply_profile(df, profile)
+
+        pd.testing.assert_frame_equal(out, expected_df)
+        assert report == expected_report
+
+    def test_full_profile_matches_reference(self):
+        self.assert_same_as_reference(raw_frame(), PROFILE)
+
+    def test_missing_headers_match_reference(self):
+        self.assert_same_as_reference(raw_frame().drop(columns=["MODELO"]), PROFILE)
+
+    def test_mapping_only_profile_matches_reference(self):
+        profile = Profile(mapping={"columns": {"Marca": "brand"}, "normalize": {"brand": "deburr"}})
+
+        self.assert_same_as_reference(raw_frame(), profile)
+
+    def test_all_numeric_frame_matches_reference(self):
+        df = pd.DataFrame({"year": [2020, 2021], "price": [199.5, np.nan]})
+        profile = Profile(mapping={"columns": {}}, compute={"add_columns": {"label": "{year} / {price}"}})
+
+        self.assert_same_as_reference(df, profile)
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_random_frames_match_reference(self, seed):
+        rng = np.random.default_rng(seed)
+        size = 200
+        df = pd.DataFrame({
+            "Marca": rng.choice([" Nissan", "CITROËN ", "Kia", "Škoda", None], size),
+            "Modelo": rng.choice(["Versa", " Río ", "C3", None], size),
+            "Año": rng.integers(1980, 2030, size),
+            "Uso": rng.choice(["particular", "Comercial", "carga"], size),
+        })
+
+        self.assert_same_as_reference(df, PROFILE)
+
+    def test_input_frame_is_not_modified(self):
+        df = raw_frame()
+        before = df.copy()
+
+        apply_profile(df, PROFILE)
+
+        pd.testing.assert_frame_equal(df, before)
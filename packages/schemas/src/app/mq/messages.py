@@ -4,13 +4,40 @@ Message schema definitions for the MQ system.
 Provides validation and type safety for queue messages.
 """
 
-import uuid
-from datetime import datetime
-from typing import Dict, Any, Optional, List, Union, Literal
-from pydantic import BaseModel, Field, validator
+import os
+from datetime import datetime, timezone
+from typing import Annotated, Dict, Any, Optional, List, Union, Literal
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, TypeAdapter, validator
 from enum import Enum
 
 
+_REQUIRED_ATTACHMENT_FIELDS = frozenset({'s3_uri', 'original_name', 'file_size'})
+_S3_PREFIX = 's3://'
+_UTC = timezone.utc
+
+
+def _now_utc() -> datetime:
+    """Timezone-aware current UTC time."""
+    return datetime.now(_UTC)
+
+
+def _new_id() -> str:
+    """Random 128-bit id in UUID text form, without building a uuid.UUID."""
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _check_s3_prefix(v: str) -> str:
+    """Validate S3 URI format."""
+    if not v.startswith(_S3_PREFIX):
+        raise ValueError("must start with 's3://'")
+    return v
+
+
+# String field that must hold an s3:// URI
+S3Uri = Annotated[str, AfterValidator(_check_s3_prefix)]
+
+
 class MessageType(str, Enum):
     """Supported message types."""
     PRE_ANALYSIS = "pre_analysis"
@@ -18,6 +45,8 @@ class MessageType(str, Enum):
     TRANSFORM = "transform"
     EXPORT = "export"
     MATCHING = "matching"
+    ERROR = "error"
+    STATUS = "status"
 
 
 class MessageStatus(str, Enum):
@@ -32,17 +61,21 @@ class MessageStatus(str, Enum):
 class BaseMessage(BaseModel):
     """Base message schema with common fields."""
     
+    # Messages are immutable once built; use model_copy(update=...) to derive one.
+    # Validated enum fields hold their plain string values, as from_trusted_dict does.
+    model_config = ConfigDict(frozen=True, use_enum_values=True)
+    
     # Message metadata
     correlation_id: str = Field(
-        default_factory=lambda: str(uuid.uuid4()),
+        default_factory=_new_id,
         description="Unique correlation ID for tracking message flow"
     )
     message_id: str = Field(
-        default_factory=lambda: str(uuid.uuid4()),
+        default_factory=_new_id,
         description="Unique message identifier"
     )
     timestamp: datetime = Field(
-        default_factory=datetime.utcnow,
+        default_factory=_now_utc,
         description="Message creation timestamp"
     )
     version: str = Field(
@@ -75,19 +108,17 @@ class BaseMessage(BaseModel):
         description="ID of parent message in processing chain"
     )
     
-    class Config:
-        """Pydantic configuration."""
-        use_enum_values = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-    
-    @validator('correlation_id', 'message_id', 'trace_id', 'parent_message_id')
-    def validate_ids(cls, v):
-        """Validate ID formats."""
-        if v is not None and not isinstance(v, str):
-            raise ValueError("IDs must be strings")
-        return v
+    @classmethod
+    def from_trusted_dict(cls, data: Dict[str, Any]) -> "BaseMessage":
+        """
+        Build a message from data produced by message_to_dict, skipping validation.
+        
+        Only for payloads from trusted producers inside the platform; anything
+        arriving from outside must go through validate_message. Values are
+        taken as-is, so e.g. timestamp stays the ISO string it was sent as;
+        enum fields are plain strings either way (use_enum_values).
+        """
+        return cls.model_construct(**data)
 
 
 class PreAnalysisMessage(BaseMessage):
@@ -123,15 +154,14 @@ class PreAnalysisMessage(BaseMessage):
             raise ValueError("At least one attachment is required for pre-analysis")
         
         # Validate each attachment has required fields
-        required_fields = ['s3_uri', 'original_name', 'file_size']
-        for i, attachment in enumerate(v):
-            for field in required_fields:
-                if field not in attachment:
-                    raise ValueError(f"Attachment {i+1} missing required field: {field}")
+        for i, attachment in enumerate(v, 1):
+            missing = _REQUIRED_ATTACHMENT_FIELDS.difference(attachment)
+            if missing:
+                raise ValueError(f"Attachment {i} missing required field: {', '.join(sorted(missing))}")
             
             # Validate S3 URI format
-            if not attachment['s3_uri'].startswith('s3://'):
-                raise ValueError(f"Attachment {i+1} s3_uri must start with 's3://'")
+            if not attachment['s3_uri'].startswith(_S3_PREFIX):
+                raise ValueError(f"Attachment {i} s3_uri must start with 's3://'")
         
         return v
 
@@ -143,7 +173,7 @@ class ExtractMessage(BaseMessage):
     
     # Required fields
     run_id: str = Field(description="Unique run identifier")
-    s3_uri: str = Field(description="S3 URI of file to extract")
+    s3_uri: S3Uri = Field(description="S3 URI of file to extract")
     
     # Optional fields
     case_id: Optional[str] = Field(
@@ -158,13 +188,6 @@ class ExtractMessage(BaseMessage):
         default_factory=dict,
         description="Extraction configuration parameters"
     )
-    
-    @validator('s3_uri')
-    def validate_s3_uri(cls, v):
-        """Validate S3 URI format."""
-        if not v.startswith('s3://'):
-            raise ValueError("s3_uri must start with 's3://'")
-        return v
 
 
 class TransformMessage(BaseMessage):
@@ -174,7 +197,7 @@ class TransformMessage(BaseMessage):
     
     # Required fields
     run_id: str = Field(description="Unique run identifier")
-    extracted_data_uri: str = Field(description="S3 URI of extracted data")
+    extracted_data_uri: S3Uri = Field(description="S3 URI of extracted data")
     
     # Optional fields
     case_id: Optional[str] = Field(
@@ -189,13 +212,6 @@ class TransformMessage(BaseMessage):
         default="json",
         description="Desired output format"
     )
-    
-    @validator('extracted_data_uri')
-    def validate_data_uri(cls, v):
-        """Validate data URI format."""
-        if not v.startswith('s3://'):
-            raise ValueError("extracted_data_uri must start with 's3://'")
-        return v
 
 
 class ExportMessage(BaseMessage):
@@ -205,7 +221,7 @@ class ExportMessage(BaseMessage):
     
     # Required fields
     run_id: str = Field(description="Unique run identifier")
-    transformed_data_uri: str = Field(description="S3 URI of transformed data")
+    transformed_data_uri: S3Uri = Field(description="S3 URI of transformed data")
     
     # Optional fields
     case_id: Optional[str] = Field(
@@ -224,13 +240,6 @@ class ExportMessage(BaseMessage):
         default=None,
         description="Specific destination URI for export"
     )
-    
-    @validator('transformed_data_uri')
-    def validate_data_uri(cls, v):
-        """Validate data URI format."""
-        if not v.startswith('s3://'):
-            raise ValueError("transformed_data_uri must start with 's3://'")
-        return v
 
 
 class VehicleMatchingMessage(BaseMessage):
@@ -275,7 +284,7 @@ class VehicleMatchingMessage(BaseMessage):
 class ErrorMessage(BaseMessage):
     """Message for error reporting and handling."""
     
-    message_type: MessageType = Field(default="error", description="Message type for error messages")
+    message_type: Literal[MessageType.ERROR] = Field(default=MessageType.ERROR, description="Message type for error messages")
     
     # Required fields
     error_type: str = Field(description="Type of error")
@@ -300,7 +309,7 @@ class ErrorMessage(BaseMessage):
 class StatusUpdateMessage(BaseMessage):
     """Message for status updates."""
     
-    message_type: MessageType = Field(default="status", description="Message type for status updates")
+    message_type: Literal[MessageType.STATUS] = Field(default=MessageType.STATUS, description="Message type for status updates")
     
     # Required fields
     run_id: str = Field(description="Run identifier")
@@ -323,15 +332,37 @@ class StatusUpdateMessage(BaseMessage):
     )
 
 
-# Message type mapping for validation
-MESSAGE_TYPE_MAP = {
-    MessageType.PRE_ANALYSIS: PreAnalysisMessage,
-    MessageType.EXTRACT: ExtractMessage,
-    MessageType.TRANSFORM: TransformMessage,
-    MessageType.EXPORT: ExportMessage,
-    MessageType.MATCHING: VehicleMatchingMessage,
+# Message type mapping for validation, keyed by the raw wire value
+MESSAGE_TYPE_MAP: Dict[str, type] = {
+    MessageType.PRE_ANALYSIS.value: PreAnalysisMessage,
+    MessageType.EXTRACT.value: ExtractMessage,
+    MessageType.TRANSFORM.value: TransformMessage,
+    MessageType.EXPORT.value: ExportMessage,
+    MessageType.MATCHING.value: VehicleMatchingMessage,
+    MessageType.ERROR.value: ErrorMessage,
+    MessageType.STATUS.value: StatusUpdateMessage,
 }
 
+# Single validator for every routable message, dispatched on message_type
+# inside pydantic-core; built once at import. The tag lookup is built from the
+# Literal[MessageType.X] annotation on each class, so those must stay Literal.
+_AnyMessage = Annotated[
+    Union[
+        PreAnalysisMessage,
+        ExtractMessage,
+        TransformMessage,
+        ExportMessage,
+        VehicleMatchingMessage,
+        ErrorMessage,
+        StatusUpdateMessage,
+    ],
+    Field(discriminator='message_type'),
+]
+MESSAGE_ADAPTER = TypeAdapter(_AnyMessage)
+
+# Same for a JSON array of messages; dump_json(messages) builds one for producers
+MESSAGE_BATCH_ADAPTER = TypeAdapter(List[_AnyMessage])
+
 
 def validate_message(message_data: Dict[str, Any]) -> BaseMessage:
     """
@@ -344,99 +375,63 @@ def validate_message(message_data: Dict[str, Any]) -> BaseMessage:
         Validated message instance
         
     Raises:
-        ValueError: If message is invalid
-        KeyError: If message type is unknown
+        ValueError: If message is invalid, or its message_type is missing or unknown
+    """
+    return MESSAGE_ADAPTER.validate_python(message_data)
+
+
+def validate_message_json(raw: Union[str, bytes]) -> BaseMessage:
+    """
+    Parse and validate a JSON-encoded message in one step.
+    
+    Args:
+        raw: JSON message body
+        
+    Returns:
+        Validated message instance
+        
+    Raises:
+        ValueError: If message is invalid, or its message_type is missing or unknown
+    """
+    return MESSAGE_ADAPTER.validate_json(raw)
+
+
+def validate_message_batch(raw: Union[str, bytes]) -> List[BaseMessage]:
+    """
+    Parse and validate a JSON array of messages in one step.
+    
+    Args:
+        raw: JSON array of message bodies
+        
+    Returns:
+        Validated message instances, in input order
+        
+    Raises:
+        ValueError: If any message is invalid, or its message_type is missing or unknown
     """
+    return MESSAGE_BATCH_ADAPTER.validate_json(raw)
+
+
+def _message_class(message_data: Dict[str, Any]) -> type:
+    """Look up the message class for raw message data."""
     message_type = message_data.get('message_type')
     if not message_type:
         raise ValueError("Message must include 'message_type' field")
     
-    if message_type not in MESSAGE_TYPE_MAP:
-        raise KeyError(f"Unknown message type: {message_type}")
-    
-    message_class = MESSAGE_TYPE_MAP[message_type]
-    return message_class(**message_data)
-
-
-def create_pre_analysis_message(
-    case_id: str,
-    email_message_id: int,
-    from_email: str,
-    subject: str,
-    attachments: List[Dict[str, Any]],
-    content: str = "",
-    **kwargs
-) -> PreAnalysisMessage:
-    """Create a validated pre-analysis message."""
-    return PreAnalysisMessage(
-        case_id=case_id,
-        email_message_id=email_message_id,
-        from_email=from_email,
-        subject=subject,
-        content=content,
-        attachments=attachments,
-        **kwargs
-    )
-
-
-def create_extract_message(
-    run_id: str,
-    s3_uri: str,
-    case_id: Optional[str] = None,
-    **kwargs
-) -> ExtractMessage:
-    """Create a validated extract message."""
-    return ExtractMessage(
-        run_id=run_id,
-        s3_uri=s3_uri,
-        case_id=case_id,
-        **kwargs
-    )
-
-
-def create_transform_message(
-    run_id: str,
-    extracted_data_uri: str,
-    case_id: Optional[str] = None,
-    **kwargs
-) -> TransformMessage:
-    """Create a validated transform message."""
-    return TransformMessage(
-        run_id=run_id,
-        extracted_data_uri=extracted_data_uri,
-        case_id=case_id,
-        **kwargs
-    )
-
-
-def create_export_message(
-    run_id: str,
-    transformed_data_uri: str,
-    case_id: Optional[str] = None,
-    **kwargs
-) -> ExportMessage:
-    """Create a validated export message."""
-    return ExportMessage(
-        run_id=run_id,
-        transformed_data_uri=transformed_data_uri,
-        case_id=case_id,
-        **kwargs
-    )
-
-
-def create_matching_message(
-    run_id: str,
-    vehicle_descriptions: List[str],
-    case_id: Optional[str] = None,
-    **kwargs
-) -> VehicleMatchingMessage:
-    """Create a validated vehicle matching message."""
-    return VehicleMatchingMessage(
-        run_id=run_id,
-        vehicle_descriptions=vehicle_descriptions,
-        case_id=case_id,
-        **kwargs
-    )
+    message_class = MESSAGE_TYPE_MAP.get(message_type)
+    if message_class is None:
+        raise ValueError(f"Unknown message type: {message_type}")
+    
+    return message_class
+
+
+# Message factories. The model classes are callables that validate directly,
+# so these are plain aliases kept for existing call sites (keyword arguments only).
+create_pre_analysis_message = PreAnalysisMessage
+create_extract_message = ExtractMessage
+create_transform_message = TransformMessage
+create_export_message = ExportMessage
+create_matching_message = VehicleMatchingMessage
 
 
 def message_to_dict(message: BaseMessage) -> Dict[str, Any]:
@@ -447,19 +442,22 @@ def message_to_dict(message: BaseMessage) -> Dict[str, Any]:
         message: Message instance
         
     Returns:
-        Dictionary representation
+        JSON-ready dictionary representation (datetimes as ISO 8601 strings)
     """
-    return message.dict(exclude_none=True)
+    return message.model_dump(mode='json', exclude_none=True)
 
 
-def dict_to_message(data: Dict[str, Any]) -> BaseMessage:
+def dict_to_message(data: Dict[str, Any], trusted: bool = False) -> BaseMessage:
     """
     Convert dictionary data back to message instance.
     
     Args:
         data: Dictionary data
+        trusted: Data comes from a trusted in-cluster producer; skip validation
         
     Returns:
         Message instance
     """
+    if trusted:
+        return _message_class(data).from_trusted_dict(data)
     return validate_message(data)
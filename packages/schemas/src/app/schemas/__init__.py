@@ -22,6 +22,7 @@ from .vehicle import (
     UseType,
     Coverage,
     FIELD_SYNONYMS,
+    SYNONYM_TO_CANONICAL,
 )
 
 __version__ = "0.1.0"
@@ -39,4 +40,5 @@ __all__ = [
     "UseType",
     "Coverage",
     "FIELD_SYNONYMS",
+    "SYNONYM_TO_CANONICAL",
 ]
\ No newline at end of file
@@ -1,13 +1,15 @@
-from typing import List, Optional, Literal
-from pydantic import BaseModel, Field, constr, conint, confloat
+from typing import Annotated, List, Optional, Literal
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 
 # --- Canonical row we pass around after extraction/transform ---
 class CanonicalVehicleRow(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     case_id: str = Field(..., description="Case this row belongs to (UUID)")
     row_idx: int = Field(..., ge=0, description="Row index within the source file")
-    brand: constr(strip_whitespace=True, to_lower=True) = Field(..., description="Marca")
-    model: constr(strip_whitespace=True) = Field(..., description="Submarca/Modelo")
-    year: conint(ge=1950, le=2100) = Field(..., description="Año")
+    brand: Annotated[str, StringConstraints(strip_whitespace=True, to_lower=True)] = Field(..., description="Marca")
+    model: Annotated[str, StringConstraints(strip_whitespace=True)] = Field(..., description="Submarca/Modelo")
+    year: int = Field(..., ge=1950, le=2100, description="Año")
     body: Optional[str] = Field(None, description="Carrocería / body style")
     use:  Optional[str] = Field(None, description="Uso (carga/pasajeros/comercial)")
     # Original free text for reference/debugging
@@ -17,15 +19,19 @@ class CanonicalVehicleRow(BaseModel):
 
 # --- Codifier output per row ---
 class Candidate(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     cvegs: str
     label: str
-    score: confloat(ge=0, le=1)
+    score: float = Field(..., ge=0, le=1)
 
 class CodifyResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     case_id: str
     row_idx: int
     suggested_cvegs: Optional[str] = None
-    confidence: confloat(ge=0, le=1) = 0.0
+    confidence: float = Field(0.0, ge=0, le=1)
     candidates: List[Candidate] = Field(default_factory=list)
     decision: Literal["auto_accept", "needs_review", "no_match"]
 
@@ -1,9 +1,13 @@
-from typing import Optional
+from typing import Annotated, Optional
 from datetime import date
 from enum import Enum
-from pydantic import BaseModel, Field, validator, constr
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, StringConstraints, validator
 import re
 
+# 17 characters, no I/O/Q; checked after to_upper, so upper case only
+_VIN_RE = re.compile(r'^[A-HJ-NPR-Z0-9]{17}$')
+_WS_RE = re.compile(r'\s+')
+
 class ValuationType(str, Enum):
     """Vehicle valuation types"""
     COMERCIAL = "COMERCIAL"
@@ -35,6 +39,15 @@ class Coverage(str, Enum):
     RC = "RC"  # Responsabilidad Civil
     BASIC = "BASIC"
 
+def _check_vin(v: str) -> str:
+    """Validate VIN format - 17 alphanumeric characters"""
+    if not _VIN_RE.match(v):
+        raise ValueError('VIN must be 17 alphanumeric characters (excluding I, O, Q)')
+    return v
+
+# Upper-casing and length stay in pydantic-core; only the format check runs in Python
+Vin = Annotated[str, StringConstraints(to_upper=True), AfterValidator(_check_vin)]
+
 class CanonicalVehicle(BaseModel):
     """
     Canonical vehicle schema with mandatory and optional fields.
@@ -43,8 +56,10 @@ class CanonicalVehicle(BaseModel):
     """
     
     # === MANDATORY FIELDS ===
-    vin: constr(min_length=17, max_length=17) = Field(
+    vin: Vin = Field(
         ..., 
+        min_length=17,
+        max_length=17,
         description="17-character alphanumeric VIN (Vehicle Identification Number)",
         example="3N1CK3CD8JL254182"
     )
@@ -71,8 +86,9 @@ class CanonicalVehicle(BaseModel):
     )
     
     # === OPTIONAL FIELDS ===
-    license_plate: Optional[constr(max_length=20)] = Field(
+    license_plate: Optional[str] = Field(
         None,
+        max_length=20,
         description="Vehicle registration plate, uppercase, no spaces"
     )
     
@@ -109,8 +125,10 @@ class CanonicalVehicle(BaseModel):
         ge=0
     )
     
-    currency: Optional[constr(min_length=3, max_length=3)] = Field(
+    currency: Optional[str] = Field(
         None,
+        min_length=3,
+        max_length=3,
         description="Currency code (ISO 4217): MXN, USD, etc.",
         example="MXN"
     )
@@ -137,18 +155,11 @@ class CanonicalVehicle(BaseModel):
     )
     
     # === VALIDATION ===
-    @validator('vin')
-    def validate_vin(cls, v):
-        """Validate VIN format - 17 alphanumeric characters"""
-        if not re.match(r'^[A-HJ-NPR-Z0-9]{17}$', v.upper()):
-            raise ValueError('VIN must be 17 alphanumeric characters (excluding I, O, Q)')
-        return v.upper()
-    
     @validator('license_plate')
     def validate_license_plate(cls, v):
         """Normalize license plate - uppercase, no spaces"""
         if v is not None:
-            return re.sub(r'\s+', '', v.upper())
+            return _WS_RE.sub('', v.upper())
         return v
     
     @validator('currency')
@@ -166,12 +177,9 @@ class CanonicalVehicle(BaseModel):
                 raise ValueError('Policy end date must be after start date')
         return v
     
-    class Config:
-        """Pydantic configuration"""
-        json_encoders = {
-            date: lambda v: v.isoformat()
-        }
-        schema_extra = {
+    model_config = ConfigDict(
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "vin": "3N1CK3CD8JL254182",
                 "description": "TOYOTA YARIS SOL L 2020",
@@ -189,7 +197,8 @@ class CanonicalVehicle(BaseModel):
                 "policy_start": "2024-01-01",
                 "policy_end": "2024-12-31"
             }
-        }
+        },
+    )
 
 # === SYNONYM MAPPINGS ===
 # These can be used by transformation services to map various input field names
@@ -280,4 +289,15 @@ FIELD_SYNONYMS = {
     "company_name": COMPANY_NAME_SYNONYMS,
     "policy_start": POLICY_START_SYNONYMS,
     "policy_end": POLICY_END_SYNONYMS,
-}
\ No newline at end of file
+}
+
+# Inverted index for header mapping, keyed by lowercase synonym:
+#   SYNONYM_TO_CANONICAL.get(header.strip().lower())
+# A synonym listed under several fields (e.g. "serie") maps to the first one.
+SYNONYM_TO_CANONICAL = {
+    synonym.lower(): field
+    for field, synonyms in reversed(FIELD_SYNONYMS.items())
+    for synonym in synonyms
+}
+
+FIELD_SYNONYMS = {field: frozenset(synonyms) for field, synonyms in FIELD_SYNONYMS.items()}
\ No newline at end of file
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 from .routes_email import router as email_router
 from .routes_upload import router as upload_router
 from .routes_processing import router as processing_router
+from app.mq.queue_factory import QueueFactory
 
 # Load environment variables
 import pathlib
@@ -81,6 +82,10 @@ app.include_router(email_router)
 app.include_router(upload_router)
 app.include_router(processing_router)  # New processing routes
 
+@app.on_event("shutdown")
+async def shutdown():
+    await QueueFactory.shutdown()
+
 @app.get("/health")
 def health():
     return {
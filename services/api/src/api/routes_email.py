@@ -93,7 +93,7 @@ async def process_manual_email(
     
     try:
         # Generate unique identifiers
-        email_content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        email_content_hash = hashlib.sha256(content.encode('utf-8')).digest()
         
         # Parse received_date
         try:
@@ -169,9 +169,10 @@ async def process_manual_email(
             
             # Create email attachments
             for attachment_info in attachment_data:
+                # Messages carry the hex digest; the column stores the raw 32 bytes
                 email_attachment = EmailAttachment(
                     email_message_id=email_message.id,
-                    **attachment_info
+                    **{**attachment_info, 'sha256': bytes.fromhex(attachment_info['sha256'])}
                 )
                 db.add(email_attachment)
             logger.info(f"Created {len(attachment_data)} email attachments")
@@ -368,7 +369,7 @@ async def get_email_details(email_id: int):
             "subject": email.subject,
             "content": email.content,
             "received_at": email.received_at.isoformat(),
-            "content_hash": email.content_hash,
+            "content_hash": email.content_hash.hex(),
             "created_at": email.created_at.isoformat(),
             "attachments": [
                 {
@@ -376,7 +377,7 @@ async def get_email_details(email_id: int):
                     "original_name": att.original_name,
                     "mime_type": att.mime_type,
                     "file_size": att.file_size,
-                    "sha256": att.sha256,
+                    "sha256": att.sha256.hex(),
                     "s3_uri": att.s3_uri,
                     "created_at": att.created_at.isoformat()
                 }
@@ -443,7 +444,7 @@ async def process_email(email_id: int):
                         'original_name': attachment.original_name,
                         'mime_type': attachment.mime_type,
                         'file_size': attachment.file_size,
-                        'sha256': attachment.sha256,
+                        'sha256': attachment.sha256.hex(),
                         's3_uri': attachment.s3_uri
                     })
                 
@@ -35,6 +35,10 @@ class ProcessingResponse(BaseModel):
     status: str
     message: str
 
+@app.on_event("shutdown")
+async def shutdown():
+    await QueueFactory.shutdown()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -115,8 +115,8 @@ def top_k(brand: str = "", model: str = "", year: int = None,
             brand=result.get("brand"),
             model=result.get("model"),
             year=result.get("year"),
-            body=result.get("body"),
-            use=result.get("use"),
+            body=result.get("body_type"),
+            use=result.get("use_type"),
             description=result.get("description")
         )
         
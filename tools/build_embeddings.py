@@ -2,8 +2,9 @@
 """
 Build embeddings for AMIS catalogue entries.
 
-This script processes the amiscatalog table and generates embeddings for all entries
+This script processes the AMIS catalogue table and generates embeddings for all entries
 using the VehicleEmbedder. It can process entries in batches and update existing embeddings.
+Rows loaded before the feature columns existed get them backfilled from their description first.
 """
 
 import argparse
@@ -12,6 +13,8 @@ import sys
 import pathlib
 from typing import Optional, List, Dict, Any
 
+import numpy as np
+
 # Add packages to path
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "packages" / "db" / "src"))
 sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "packages" / "ml" / "src"))
@@ -21,6 +24,7 @@ from sqlalchemy.orm import sessionmaker
 from app.db.session import engine
 from app.db.models import AmisCatalog
 from app.ml.embed import get_embedder
+from app.ml.normalize import FEATURE_COLUMNS, features_from_columns, vehicle_feature_columns
 from app.ml.retrieve import VehicleRetriever
 
 # Setup logging
@@ -30,11 +34,48 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CATALOG_TABLE = AmisCatalog.__tablename__
+FEATURE_COLUMN_NAMES = list(FEATURE_COLUMNS.values())
+VEHICLE_COLUMNS = "id, cvegs, brand, model, year, body_type, use_type, description, text_hash, " + ", ".join(FEATURE_COLUMN_NAMES)
+
+def backfill_feature_columns(session, batch_size: int = 1000) -> int:
+    """Fill the feature columns of rows that have none yet from their description."""
+    missing = " AND ".join(f"{column} IS NULL" for column in FEATURE_COLUMN_NAMES)
+    assignments = ", ".join(f"{column} = :{column}" for column in FEATURE_COLUMN_NAMES)
+    
+    updated = 0
+    last_id = 0
+    while True:
+        rows = session.execute(
+            text(f"""
+            SELECT id, description
+            FROM {CATALOG_TABLE}
+            WHERE id > :last_id AND {missing}
+            ORDER BY id
+            LIMIT :limit
+            """),
+            {"last_id": last_id, "limit": batch_size}
+        ).fetchall()
+        if not rows:
+            break
+        
+        # Descriptions with no recognisable features legitimately stay all-NULL
+        update_data = [{"id": vehicle_id, **vehicle_feature_columns(description)} for vehicle_id, description in rows]
+        update_data = [row for row in update_data if any(row[column] for column in FEATURE_COLUMN_NAMES)]
+        if update_data:
+            session.execute(text(f"UPDATE {CATALOG_TABLE} SET {assignments} WHERE id = :id"), update_data)
+            session.commit()
+        
+        updated += len(update_data)
+        last_id = rows[-1][0]
+    
+    return updated
+
 def get_vehicles_without_embeddings(session, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """Get vehicles that don't have embeddings yet."""
-    query = """
-    SELECT id, cvegs, brand, model, year, body, use, description, aliases
-    FROM amiscatalog 
+    query = f"""
+    SELECT {VEHICLE_COLUMNS}
+    FROM {CATALOG_TABLE} 
     WHERE embedding IS NULL
     """
     
@@ -43,45 +84,31 @@ def get_vehicles_without_embeddings(session, limit: Optional[int] = None) -> Lis
     
     result = session.execute(text(query))
     
-    vehicles = []
-    for row in result.fetchall():
-        vehicle = {
-            "id": row[0],
-            "cvegs": row[1], 
-            "brand": row[2],
-            "model": row[3],
-            "year": row[4],
-            "body": row[5],
-            "use": row[6],
-            "description": row[7],
-            "aliases": row[8]
-        }
-        vehicles.append(vehicle)
-    
-    return vehicles
+    return [dict(row._mapping) for row in result.fetchall()]
 
 def update_embeddings(session, vehicle_embeddings: List[tuple]) -> None:
     """Update embeddings in the database."""
     try:
         # Prepare batch update
         update_data = []
-        for vehicle_id, embedding in vehicle_embeddings:
-            # Convert numpy array to list for JSON serialization
-            embedding_list = embedding.tolist()
+        for vehicle_id, embedding, text_hash in vehicle_embeddings:
+            # The column is halfvec, so send FP16 values (shorter literals, no server-side rounding)
+            embedding_list = embedding.astype(np.float16).tolist()
             # Convert to pgvector format string
             embedding_str = "[" + ",".join(map(str, embedding_list)) + "]"
             
             update_data.append({
                 "id": vehicle_id,
-                "embedding": embedding_str
+                "embedding": embedding_str,
+                "text_hash": text_hash
             })
         
         # Batch update using SQLAlchemy
         if update_data:
             session.execute(
-                text("""
-                UPDATE amiscatalog 
-                SET embedding = :embedding::vector 
+                text(f"""
+                UPDATE {CATALOG_TABLE} 
+                SET embedding = CAST(:embedding AS halfvec), text_hash = :text_hash
                 WHERE id = :id
                 """),
                 update_data
@@ -116,11 +143,15 @@ def build_embeddings(batch_size: int = 32,
     session = Session()
     
     try:
+        backfilled = backfill_feature_columns(session)
+        if backfilled:
+            logger.info(f"Backfilled feature columns for {backfilled} vehicles")
+        
         # Get total count
         if force_rebuild:
-            count_query = "SELECT COUNT(*) FROM amiscatalog"
+            count_query = f"SELECT COUNT(*) FROM {CATALOG_TABLE}"
         else:
-            count_query = "SELECT COUNT(*) FROM amiscatalog WHERE embedding IS NULL"
+            count_query = f"SELECT COUNT(*) FROM {CATALOG_TABLE} WHERE embedding IS NULL"
         
         total_result = session.execute(text(count_query))
         total_count = total_result.fetchone()[0]
@@ -135,9 +166,9 @@ def build_embeddings(batch_size: int = 32,
         while True:
             # Get batch of vehicles
             if force_rebuild:
-                query = """
-                SELECT id, cvegs, brand, model, year, body, use, description, aliases
-                FROM amiscatalog 
+                query = f"""
+                SELECT {VEHICLE_COLUMNS}
+                FROM {CATALOG_TABLE} 
                 ORDER BY id
                 LIMIT :limit OFFSET :offset
                 """
@@ -150,12 +181,11 @@ def build_embeddings(batch_size: int = 32,
                 if not vehicles:
                     break
                 
-                # Convert to result format for consistency
-                result = [(v["id"], v["cvegs"], v["brand"], v["model"], v["year"], 
-                          v["body"], v["use"], v["description"], v["aliases"]) for v in vehicles]
+                # With no embedding a stored hash is stale
+                result = [{**v, "text_hash": None} for v in vehicles]
             
             if force_rebuild:
-                batch_data = result.fetchall()
+                batch_data = [dict(row._mapping) for row in result.fetchall()]
                 if not batch_data:
                     break
             else:
@@ -168,24 +198,25 @@ def build_embeddings(batch_size: int = 32,
             vehicle_ids = []
             
             for row in batch_data:
-                vehicle_id, cvegs, brand, model, year, body, use, description, aliases = row
-                
                 vehicles_for_embedding.append({
-                    "brand": brand or "",
-                    "model": model or "",
-                    "year": year,
-                    "description": description or "",
-                    "body": body or "",
-                    "use": use or ""
+                    "brand": row["brand"] or "",
+                    "model": row["model"] or "",
+                    "year": row["year"],
+                    "description": row["description"] or "",
+                    "body": row["body_type"] or "",
+                    "use": row["use_type"] or "",
+                    # Stored at ingest/backfill, so the description isn't parsed again here
+                    "features": features_from_columns(row),
+                    "text_hash": row["text_hash"]
                 })
-                vehicle_ids.append(vehicle_id)
+                vehicle_ids.append(row["id"])
             
-            # Generate embeddings
+            # Generate embeddings, skipping rows whose text hash is unchanged
             logger.info(f"Generating embeddings for batch of {len(vehicles_for_embedding)} vehicles...")
-            embeddings = embedder.embed_batch(vehicles_for_embedding, batch_size=batch_size)
+            changed = embedder.embed_changed(vehicles_for_embedding, batch_size=batch_size)
             
             # Update database
-            vehicle_embeddings = list(zip(vehicle_ids, embeddings))
+            vehicle_embeddings = [(vehicle_ids[i], embedding, text_hash) for i, embedding, text_hash in changed]
             update_embeddings(session, vehicle_embeddings)
             
             processed += len(batch_data)
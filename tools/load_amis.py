@@ -1,18 +1,10 @@
 #!/usr/bin/env python3
-import argparse, pathlib, sys, json
+import argparse, asyncio, pathlib
 import pandas as pd
-from sqlalchemy import insert
-from app.db.session import engine
+from app.db.bulk import bulk_load_amis
+from app.db.database import async_engine
 from app.db.models import AmisCatalog
-
-def read_alias_yaml(path: pathlib.Path):
-    try:
-        import yaml
-        return yaml.safe_load(path.read_text(encoding="utf-8"))
-    except FileNotFoundError:
-        return {}
-    except Exception as e:
-        print(f"Alias load warning {path}: {e}", file=sys.stderr); return {}
+from app.ml.normalize import vehicle_feature_columns
 
 def norm(s):
     import re, unicodedata
@@ -23,13 +15,21 @@ def norm(s):
     s = re.sub(r"\s+", " ", s)
     return s
 
+async def load_rows(rows):
+    """Replace the catalogue with rows in one transaction, streamed with binary COPY."""
+    try:
+        async with async_engine.begin() as cx:
+            # optional: clean table first if desired
+            await cx.execute(AmisCatalog.__table__.delete())
+            raw = await cx.get_raw_connection()
+            return await bulk_load_amis(raw.driver_connection, rows)
+    finally:
+        await async_engine.dispose()
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--file", required=True, help="AMIS/CVEGS csv/xlsx")
     ap.add_argument("--sheet", default=None, help="Sheet name for xlsx")
-    ap.add_argument("--brands", default="configs/aliases/brands.yaml")
-    ap.add_argument("--models", default="configs/aliases/models.yaml")
-    ap.add_argument("--bodies", default="configs/aliases/bodies.yaml")
     args = ap.parse_args()
 
     p = pathlib.Path(args.file)
@@ -53,34 +53,25 @@ def main():
     use  = cols.get("uso") or cols.get("use")
     desc = cols.get("descripcion") or cols.get("descripción") or cols.get("description")
 
-    brand_aliases = read_alias_yaml(pathlib.Path(args.brands))
-    model_aliases = read_alias_yaml(pathlib.Path(args.models))
-    body_aliases  = read_alias_yaml(pathlib.Path(args.bodies))
-
     rows = []
     for _, r in df.iterrows():
+        description = str(r[desc]).strip() if desc and pd.notnull(r[desc]) else None
         rows.append({
             "cvegs": str(r[cve]).strip(),
             "brand": norm(r[brand]),
             "model": norm(r[model]),
             "year": int(r[year]) if pd.notnull(r[year]) else None,
-            "body": norm(r[body]) if body else None,
-            "use":  norm(r[use]) if use else None,
-            "description": str(r[desc]).strip() if desc and pd.notnull(r[desc]) else None,
-            "aliases": {
-                "brand": brand_aliases.get(norm(r[brand]), []),
-                "model": model_aliases.get(norm(r[model]), []),
-                "body":  body_aliases.get(norm(r[body])) if body else [],
-            },
-            "embedding": None,  # will be filled in step 5
+            "body_type": norm(r[body]) if body else None,
+            "use_type":  norm(r[use]) if use else None,
+            "description": description,
+            # parsed once here so search and embedding never re-run the extractor
+            **vehicle_feature_columns(description),
+            # embedding/text_hash are filled in by tools/build_embeddings.py
         })
 
-    with engine.begin() as cx:
-        # optional: clean table first if desired
-        cx.execute(AmisCatalog.__table__.delete())
-        cx.execute(insert(AmisCatalog), rows)
+    loaded = asyncio.run(load_rows(rows))
 
-    print(f"Loaded {len(rows)} rows into amiscatalog.")
+    print(f"Loaded {loaded} rows into {AmisCatalog.__tablename__}.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
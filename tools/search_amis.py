@@ -29,10 +29,10 @@ def format_vehicle_result(vehicle: Dict[str, Any], show_embedding: bool = False)
     lines.append(f"Vehicle: {vehicle.get('brand', '')} {vehicle.get('model', '')} {vehicle.get('year', '')}")
     
     # Additional details
-    if vehicle.get('body'):
-        lines.append(f"Body: {vehicle['body']}")
-    if vehicle.get('use'):
-        lines.append(f"Use: {vehicle['use']}")
+    if vehicle.get('body_type'):
+        lines.append(f"Body: {vehicle['body_type']}")
+    if vehicle.get('use_type'):
+        lines.append(f"Use: {vehicle['use_type']}")
     if vehicle.get('description'):
         lines.append(f"Description: {vehicle['description']}")
     